@@ -0,0 +1,118 @@
+"""
+Adaptive Limiter - AIMD concurrency control and retry backoff for provider APIs
+"""
+import asyncio
+import random
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class AIMDLimiter:
+    """
+    Concurrency limiter that discovers a provider's sustainable rate.
+
+    The number of requests allowed in flight grows additively (+1 per
+    window of successful calls) and is cut multiplicatively whenever the
+    provider throttles us, the same way TCP congestion control probes
+    for bandwidth.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        backoff_factor: float = 0.5
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_factor = backoff_factor
+        self.in_flight = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def _cond(self) -> asyncio.Condition:
+        # Created lazily so the limiter can be built outside a running loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one in-flight slot for the duration of a request"""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self):
+        """Additive increase: about +1 slot per `limit` successful calls"""
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def on_throttle(self):
+        """Multiplicative decrease after a 429/overload response"""
+        self.limit = max(self.min_limit, self.limit * self.backoff_factor)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header
+
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+
+    Returns:
+        Delay in seconds, or None if missing/unparseable
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(
+    attempt: int,
+    retry_after: Optional[float] = None,
+    base: float = 1.0,
+    cap: float = 30.0
+) -> float:
+    """
+    Delay before the next retry
+
+    Honors the server's Retry-After when given, otherwise exponential
+    backoff with full jitter.
+
+    Args:
+        attempt: Zero-based retry attempt
+        retry_after: Server-provided delay in seconds
+        base: Base delay in seconds
+        cap: Maximum delay in seconds
+
+    Returns:
+        Seconds to sleep
+    """
+    if retry_after is not None:
+        return min(retry_after, cap)
+
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,111 @@
+"""
+Contact Extraction Benchmark - Single-pass extractor vs the original four-pass version
+
+Usage:
+    python backend/tools/benchmark_contacts.py [--pages 200] [--page-kb 64] [--repeat 5]
+"""
+import re
+import random
+import argparse
+import timeit
+from typing import Dict, List
+
+from backend.tools.firecrawl_scraper import extract_contacts
+
+
+def legacy_extract_contacts(content: str) -> Dict:
+    """Previous implementation: four findall passes, patterns compiled per call"""
+    contacts = {
+        "emails": [],
+        "github": None,
+        "twitter": None,
+        "linkedin": None,
+        "website": None
+    }
+
+    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', content)
+    contacts["emails"] = list(set(emails))
+
+    github_matches = re.findall(r'github\.com/([a-zA-Z0-9_-]+)', content)
+    if github_matches:
+        contacts["github"] = f"https://github.com/{github_matches[0]}"
+
+    twitter_matches = re.findall(r'(?:twitter\.com/|@)([a-zA-Z0-9_]+)', content)
+    if twitter_matches:
+        contacts["twitter"] = f"https://twitter.com/{twitter_matches[0]}"
+
+    linkedin_matches = re.findall(r'linkedin\.com/(?:in|company)/([a-zA-Z0-9_-]+)', content)
+    if linkedin_matches:
+        contacts["linkedin"] = f"https://linkedin.com/in/{linkedin_matches[0]}"
+
+    return contacts
+
+
+def build_corpus(pages: int, page_kb: int, seed: int = 42) -> List[str]:
+    """
+    Generate markdown pages resembling crawled docs/README content
+
+    Contact links are scattered through each page (some near the top, as in
+    READMEs, some only in the footer) to exercise both early exit and full scans.
+    """
+    rng = random.Random(seed)
+    words = (
+        "agent workflow tool memory planner install usage example config api "
+        "model prompt chain retriever vector async deploy docker license"
+    ).split()
+    contact_lines = [
+        "Contact us at team@example.com or support@example.org.",
+        "Source: [GitHub](https://github.com/example-org/agent)",
+        "Follow [@example_ai](https://twitter.com/example_ai) for updates.",
+        "Company page: https://www.linkedin.com/company/example-ai",
+    ]
+
+    corpus = []
+    for _ in range(pages):
+        lines = []
+        size = 0
+        while size < page_kb * 1024:
+            if rng.random() < 0.3:
+                line = f"## {rng.choice(words).title()} {rng.choice(words)}"
+            elif rng.random() < 0.1:
+                line = "```python\nagent.run(" + repr(" ".join(rng.choices(words, k=6))) + ")\n```"
+            else:
+                line = " ".join(rng.choices(words, k=rng.randint(8, 24))) + "."
+            lines.append(line)
+            size += len(line) + 1
+
+        # Half the pages list contacts near the top, the rest only in the footer
+        position = 3 if rng.random() < 0.5 else len(lines)
+        for contact in rng.sample(contact_lines, k=len(contact_lines)):
+            lines.insert(position, contact)
+
+        corpus.append("\n".join(lines))
+
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-kb", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.pages, args.page_kb)
+    total_mb = sum(len(page) for page in corpus) / (1024 * 1024)
+    print(f"Corpus: {args.pages} pages, {total_mb:.1f} MB")
+
+    for name, extractor in [
+        ("legacy (4 passes)", legacy_extract_contacts),
+        ("single pass", extract_contacts),
+    ]:
+        best = min(timeit.repeat(
+            lambda: [extractor(page) for page in corpus],
+            number=1,
+            repeat=args.repeat
+        ))
+        print(f"  {name:<18} {best * 1000:8.1f} ms  ({total_mb / best:6.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Firecrawl Webhook Receiver - Push-based crawl progress and completion
+"""
+import hmac
+import json
+import asyncio
+import hashlib
+from typing import Dict, List, Optional
+
+
+class CrawlWebhookReceiver:
+    """
+    Routes Firecrawl crawl webhooks to the coroutine waiting on that crawl.
+
+    FirecrawlTool registers a crawl id and reads events from the returned
+    queue; the receiver endpoint (see create_router) feeds them in. Events
+    that arrive before their crawl is registered are buffered briefly.
+    """
+
+    def __init__(self, secret: Optional[str] = None, max_buffered: int = 1000):
+        self.secret = secret
+        self.max_buffered = max_buffered
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._early: Dict[str, List[Dict]] = {}
+
+    def register(self, crawl_id: str) -> asyncio.Queue:
+        """
+        Start receiving events for a crawl
+
+        Returns:
+            Queue of webhook payloads for this crawl
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self._early.pop(crawl_id, []):
+            queue.put_nowait(event)
+        self._queues[crawl_id] = queue
+        return queue
+
+    def unregister(self, crawl_id: str):
+        """Stop receiving events for a crawl"""
+        self._queues.pop(crawl_id, None)
+        self._early.pop(crawl_id, None)
+
+    def handle(self, payload: Dict) -> bool:
+        """
+        Route one webhook payload
+
+        Args:
+            payload: Firecrawl webhook body ({"type": "crawl.page", "id": ..., "data": [...]})
+
+        Returns:
+            True if a waiting crawl received it
+        """
+        crawl_id = payload.get("id")
+        if not crawl_id:
+            return False
+
+        queue = self._queues.get(crawl_id)
+        if queue is not None:
+            queue.put_nowait(payload)
+            return True
+
+        # Crawl not registered yet (webhook raced the POST /crawl response)
+        if sum(len(events) for events in self._early.values()) < self.max_buffered:
+            self._early.setdefault(crawl_id, []).append(payload)
+        return False
+
+    def verify_signature(self, body: bytes, signature: Optional[str]) -> bool:
+        """Check the X-Firecrawl-Signature HMAC when a secret is configured"""
+        if not self.secret:
+            return True
+        if not signature:
+            return False
+
+        expected = hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature.removeprefix("sha256="), expected)
+
+    def create_router(self, path: str = "/api/discovery/webhooks/firecrawl"):
+        """
+        Build a FastAPI router exposing the receiver endpoint
+
+        Args:
+            path: Route path; the public URL of this route is the
+                FirecrawlTool webhook_url
+
+        Returns:
+            APIRouter to include in the FastAPI app
+        """
+        from fastapi import APIRouter, HTTPException, Request
+
+        router = APIRouter(tags=["discovery"])
+
+        @router.post(path)
+        async def firecrawl_webhook(request: Request):
+            """Receive Firecrawl crawl events."""
+            body = await request.body()
+            if not self.verify_signature(body, request.headers.get("X-Firecrawl-Signature")):
+                raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+            try:
+                payload = json.loads(body)
+            except json.JSONDecodeError:
+                raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+            return {"received": self.handle(payload)}
+
+        return router
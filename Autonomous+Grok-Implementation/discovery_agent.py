@@ -5,6 +5,8 @@ import asyncio
 from typing import List, Dict, TypedDict, Optional
 from datetime import datetime
 import json
+import re
+from pydantic import BaseModel, Field
 
 # Import existing Aletheia components
 # from backend.agents.research_agent import ResearchAgent
@@ -14,6 +16,10 @@ import json
 # Import new tools
 from backend.tools.grok_search import GrokSearchTool
 from backend.tools.firecrawl_scraper import FirecrawlTool
+from backend.tools.scrape_cache import ScrapeCache
+from backend.agents.discovery_checkpoint import DiscoveryCheckpointStore
+from backend.agents.discovery_dedup import cluster_near_duplicates
+from backend.tools.llm_json import generate_json, LLMJSONError
 
 
 class DiscoveryState(TypedDict):
@@ -37,6 +43,7 @@ class DiscoveryState(TypedDict):
     
     # Output
     agents_to_store: List[Dict]
+    rejected_agents: List[Dict]
     outreach_list: List[Dict]
     
     # Metadata
@@ -45,6 +52,33 @@ class DiscoveryState(TypedDict):
     run_id: str
     started_at: str
     status: str
+    completed_phases: List[str]
+
+
+class LeadClassification(BaseModel):
+    """MiniMax relevance verdict for a search result"""
+    
+    is_agent: bool
+    confidence: float = Field(0.0, ge=0.0, le=1.0)
+    reasoning: str = ""
+    preliminary_category: Optional[str] = None
+
+
+class AgentProfile(BaseModel):
+    """Structured agent record extracted by MiniMax"""
+    
+    name: str
+    slug: Optional[str] = None
+    description: Optional[str] = None
+    capabilities: List[str] = []
+    framework: Optional[str] = None
+    category: Optional[str] = None
+    tags: List[str] = []
+    endpoint_url: Optional[str] = None
+    documentation_url: Optional[str] = None
+    source_url: Optional[str] = None
+    contacts: Dict[str, Optional[str]] = {}
+    confidence_score: float = Field(0.0, ge=0.0, le=1.0)
 
 
 class AgentDiscoverySystem:
@@ -66,13 +100,52 @@ class AgentDiscoverySystem:
         tavily_client,
         grok_api_key: str,
         firecrawl_api_key: str,
-        supabase_client
+        supabase_client,
+        checkpoint_store: Optional[DiscoveryCheckpointStore] = None,
+        store_batch_size: int = 100,
+        store_conflict_key: str = "slug",
+        dedup_threshold: float = 0.5,
+        scrape_cache: Optional[ScrapeCache] = None
     ):
         self.minimax = minimax_client
         self.tavily = tavily_client
         self.grok = GrokSearchTool(grok_api_key)
-        self.firecrawl = FirecrawlTool(firecrawl_api_key)
+        self.firecrawl = FirecrawlTool(
+            firecrawl_api_key,
+            cache=scrape_cache or ScrapeCache()
+        )
         self.db = supabase_client
+        self.checkpoints = checkpoint_store or DiscoveryCheckpointStore()
+        
+        # discovered_agents upserts: rows per request and the unique column
+        # ('slug' or 'source_url') that identifies an existing agent
+        self.store_batch_size = store_batch_size
+        self.store_conflict_key = store_conflict_key
+        
+        # Minimum MinHash similarity for two leads to count as the same agent
+        self.dedup_threshold = dedup_threshold
+
+        # Phases in execution order; names are used as checkpoint keys
+        self.phases = [
+            ("grok_sweep", self._grok_sweep),
+            ("filter_classify", self._filter_classify),
+            ("tavily_research", self._tavily_research),
+            ("firecrawl_extract", self._firecrawl_extract),
+            ("minimax_analyze", self._minimax_analyze),
+            ("store_results", self._store_results),
+            ("generate_outreach", self._generate_outreach),
+        ]
+    
+    async def aclose(self):
+        """Close the pooled HTTP connections held by the discovery tools"""
+        await self.grok.aclose()
+        await self.firecrawl.aclose()
+    
+    async def __aenter__(self) -> "AgentDiscoverySystem":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
         
     async def discover(
         self,
@@ -103,35 +176,63 @@ class AgentDiscoverySystem:
             "scraped_content": [],
             "classified_agents": [],
             "agents_to_store": [],
+            "rejected_agents": [],
             "outreach_list": [],
             "thinking_steps": [],
             "sources": [],
             "run_id": self._generate_run_id(),
             "started_at": datetime.utcnow().isoformat(),
-            "status": "running"
+            "status": "running",
+            "completed_phases": []
         }
         
-        try:
-            # Phase 1: Grok Sweep
-            state = await self._grok_sweep(state)
-            
-            # Phase 2: Filter & Classify
-            state = await self._filter_classify(state)
-            
-            # Phase 3: Tavily Deep Dive
-            state = await self._tavily_research(state)
-            
-            # Phase 4: Firecrawl Extract
-            state = await self._firecrawl_extract(state)
-            
-            # Phase 5: MiniMax Analysis
-            state = await self._minimax_analyze(state)
-            
-            # Phase 6: Store Results
-            state = await self._store_results(state)
+        return await self._run_phases(state)
+    
+    async def resume(self, run_id: str) -> DiscoveryState:
+        """
+        Resume a failed or interrupted discovery run from its last checkpoint
+        
+        Completed phases are skipped entirely, and leads already processed
+        inside the interrupted phase are served from their lead checkpoints,
+        so no paid Grok/Tavily/Firecrawl/MiniMax call is repeated.
+        
+        Args:
+            run_id: ID of the run to resume
             
-            # Phase 7: Generate Outreach
-            state = await self._generate_outreach(state)
+        Returns:
+            Complete discovery state with results
+        """
+        state = await asyncio.to_thread(self.checkpoints.load_state, run_id)
+        if state is None:
+            raise ValueError(f"No checkpoint found for discovery run {run_id}")
+        
+        if state.get("status") == "completed":
+            return state
+        
+        state.setdefault("completed_phases", [])
+        state["status"] = "running"
+        state["thinking_steps"].append({
+            "step": len(state["thinking_steps"]) + 1,
+            "action": "resume",
+            "description": f"Resuming run after {len(state['completed_phases'])} completed phases",
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        
+        return await self._run_phases(state)
+    
+    async def _run_phases(self, state: DiscoveryState) -> DiscoveryState:
+        """Run every phase not yet completed, checkpointing after each one"""
+        
+        phase_name = "init"
+        
+        try:
+            for phase_name, phase in self.phases:
+                if phase_name in state["completed_phases"]:
+                    continue
+                
+                state = await phase(state)
+                state["completed_phases"].append(phase_name)
+                await asyncio.to_thread(self.checkpoints.save_state, state, phase_name)
             
             state["status"] = "completed"
             
@@ -140,12 +241,18 @@ class AgentDiscoverySystem:
             state["thinking_steps"].append({
                 "step": len(state["thinking_steps"]) + 1,
                 "action": "error",
-                "description": f"Discovery failed: {str(e)}",
+                "description": f"Discovery failed in {phase_name}: {str(e)}",
                 "timestamp": datetime.utcnow().isoformat()
             })
         
+        await asyncio.to_thread(self.checkpoints.save_state, state, phase_name)
+        
         return state
     
+    def _lead_key(self, lead: Dict) -> str:
+        """Stable checkpoint key for a lead"""
+        return lead.get("url") or lead.get("source_url") or lead.get("slug") or json.dumps(lead, sort_keys=True, default=str)
+    
     async def _grok_sweep(self, state: DiscoveryState) -> DiscoveryState:
         """Phase 1: Fast bulk discovery with Grok"""
         
@@ -162,15 +269,27 @@ class AgentDiscoverySystem:
             queries.append(keyword)
         
         # Execute bulk search
-        results = await self.grok.bulk_search(
+        outcomes = await self.grok.bulk_search_detailed(
             queries,
             max_results_per_query=20
         )
         
         # Flatten results
         all_results = []
-        for query, query_results in results.items():
-            all_results.extend(query_results)
+        failed_queries = []
+        for query, outcome in outcomes.items():
+            if outcome["status"] != "ok":
+                failed_queries.append(f"{query} ({outcome['error']})")
+                continue
+            all_results.extend(outcome["results"])
+        
+        if failed_queries:
+            state["thinking_steps"].append({
+                "step": len(state["thinking_steps"]) + 1,
+                "action": "grok_sweep_failures",
+                "description": f"{len(failed_queries)}/{len(queries)} queries failed: " + "; ".join(failed_queries),
+                "timestamp": datetime.utcnow().isoformat()
+            })
         
         # Deduplicate by URL
         seen_urls = set()
@@ -205,8 +324,15 @@ class AgentDiscoverySystem:
         
         # Use MiniMax to classify each result
         filtered = []
+        done = await asyncio.to_thread(self.checkpoints.load_leads, state["run_id"], "filter_classify")
         
         for result in state["grok_results"]:
+            lead_key = self._lead_key(result)
+            if lead_key in done:
+                if done[lead_key]["keep"]:
+                    filtered.append(done[lead_key]["lead"])
+                continue
+            
             # Create classification prompt
             prompt = f"""
             Analyze this search result and determine if it's an AI agent.
@@ -228,24 +354,31 @@ class AgentDiscoverySystem:
             }}
             """
             
-            # Get MiniMax classification
-            response = await self.minimax.generate(
-                prompt,
-                temperature=0.1,
-                max_tokens=200
-            )
-            
+            keep = False
             try:
-                # Parse response
-                classification = json.loads(response)
+                # Get MiniMax classification
+                classification = await generate_json(
+                    self.minimax.generate,
+                    prompt,
+                    LeadClassification,
+                    temperature=0.1,
+                    max_tokens=200
+                )
                 
-                if classification.get("is_agent") and classification.get("confidence", 0) > 0.6:
-                    result["classification"] = classification
+                if classification.is_agent and classification.confidence > 0.6:
+                    result["classification"] = classification.model_dump()
                     filtered.append(result)
+                    keep = True
                     
-            except json.JSONDecodeError:
-                # Skip if can't parse
-                continue
+            except LLMJSONError:
+                # Skip if can't parse even after repair
+                pass
+            
+            await asyncio.to_thread(
+                self.checkpoints.save_lead,
+                state["run_id"], "filter_classify", lead_key,
+                {"keep": keep, "lead": result}
+            )
         
         state["filtered_leads"] = filtered
         
@@ -271,8 +404,17 @@ class AgentDiscoverySystem:
         
         # Research each high-confidence lead
         researched = []
+        research_sources = []
+        done = await asyncio.to_thread(self.checkpoints.load_leads, state["run_id"], "tavily_research")
         
         for lead in state["filtered_leads"][:30]:  # Limit to top 30 to control costs
+            lead_key = self._lead_key(lead)
+            if lead_key in done:
+                lead = done[lead_key]["lead"]
+                researched.append(lead)
+                research_sources.extend(done[lead_key]["sources"])
+                continue
+            
             # Build research query
             query = f"{lead.get('title', '')} AI agent details documentation"
             
@@ -287,13 +429,21 @@ class AgentDiscoverySystem:
             researched.append(lead)
             
             # Add to sources
-            state["sources"].extend([{
+            sources = [{
                 "url": r.get("url"),
                 "title": r.get("title"),
                 "score": r.get("score")
-            } for r in tavily_results])
+            } for r in tavily_results]
+            research_sources.extend(sources)
+            
+            await asyncio.to_thread(
+                self.checkpoints.save_lead,
+                state["run_id"], "tavily_research", lead_key,
+                {"lead": lead, "sources": sources}
+            )
         
         state["tavily_results"] = researched
+        state["sources"].extend(research_sources)
         
         state["thinking_steps"].append({
             "step": len(state["thinking_steps"]) + 1,
@@ -317,9 +467,14 @@ class AgentDiscoverySystem:
         
         # Scrape each lead's primary URL
         scraped = []
+        done = await asyncio.to_thread(self.checkpoints.load_leads, state["run_id"], "firecrawl_extract")
         
         for lead in state["tavily_results"][:20]:  # Limit to top 20
             url = lead.get("url")
+            lead_key = self._lead_key(lead)
+            if lead_key in done:
+                scraped.append(done[lead_key]["lead"])
+                continue
             
             try:
                 # Scrape with contact extraction
@@ -332,6 +487,12 @@ class AgentDiscoverySystem:
                 lead["scraped_content"] = content
                 scraped.append(lead)
                 
+                await asyncio.to_thread(
+                    self.checkpoints.save_lead,
+                    state["run_id"], "firecrawl_extract", lead_key,
+                    {"lead": lead}
+                )
+                
             except Exception as e:
                 # Log error but continue
                 print(f"Failed to scrape {url}: {e}")
@@ -359,15 +520,39 @@ class AgentDiscoverySystem:
             "timestamp": datetime.utcnow().isoformat()
         })
         
-        # Analyze each scraped result
+        # Collapse leads describing the same agent (repo, docs, product page,
+        # PyPI...) so only one representative per cluster is analyzed
+        clusters = cluster_near_duplicates(
+            state["scraped_content"],
+            threshold=self.dedup_threshold
+        )
+        
+        state["thinking_steps"].append({
+            "step": len(state["thinking_steps"]) + 1,
+            "action": "dedup_leads",
+            "description": f"Grouped {len(state['scraped_content'])} leads into {len(clusters)} distinct agents",
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        
+        # Analyze each cluster representative
         classified = []
+        done = await asyncio.to_thread(self.checkpoints.load_leads, state["run_id"], "minimax_analyze")
         
-        for lead in state["scraped_content"]:
+        for cluster in clusters:
+            lead = cluster[0]
+            related_urls = [d.get("url") for d in cluster[1:] if d.get("url")]
+            
+            lead_key = self._lead_key(lead)
+            if lead_key in done:
+                classified.append(done[lead_key]["agent"])
+                continue
+            
             # Combine all available data
             combined_data = {
                 "original_result": lead,
                 "scraped_content": lead.get("scraped_content", {}).get("markdown", "")[:5000],
-                "tavily_research": lead.get("tavily_research", [])
+                "tavily_research": lead.get("tavily_research", []),
+                "related_urls": related_urls
             }
             
             # Create analysis prompt
@@ -401,20 +586,28 @@ class AgentDiscoverySystem:
             """
             
             try:
-                # Get MiniMax analysis
-                response = await self.minimax.generate(
+                # Get MiniMax analysis as validated structured data
+                profile = await generate_json(
+                    self.minimax.generate,
                     prompt,
+                    AgentProfile,
                     temperature=0.1,
                     max_tokens=1000
                 )
                 
-                # Parse structured data
-                agent_data = json.loads(response)
+                agent_data = profile.model_dump()
                 agent_data["raw_data"] = combined_data
+                agent_data["related_urls"] = related_urls
                 agent_data["discovered_at"] = datetime.utcnow().isoformat()
                 
                 classified.append(agent_data)
                 
+                await asyncio.to_thread(
+                    self.checkpoints.save_lead,
+                    state["run_id"], "minimax_analyze", lead_key,
+                    {"agent": agent_data}
+                )
+                
             except Exception as e:
                 print(f"Failed to analyze lead: {e}")
                 continue
@@ -442,42 +635,84 @@ class AgentDiscoverySystem:
         })
         
         stored = []
-        
+        rejected = []
+        done = await asyncio.to_thread(self.checkpoints.load_leads, state["run_id"], "store_results")
+        
+        # Build one row per agent. Both slug and source_url are unique in the
+        # schema, so drop rows that repeat either within this run; a batch
+        # that hits the same row twice fails as a whole
+        pending = []
+        seen = {"slug": set(), "source_url": set()}
         for agent in state["classified_agents"]:
+            lead_key = self._lead_key(agent)
+            if lead_key in done:
+                stored.append(done[lead_key]["row"])
+                continue
+            
+            row = self._agent_row(agent)
+            missing = [
+                column for column in ("name", "source_url", self.store_conflict_key)
+                if not row.get(column)
+            ]
+            if missing:
+                rejected.append({"row": row, "reason": f"missing {', '.join(missing)}"})
+                continue
+            
+            duplicate = [column for column in seen if row.get(column) in seen[column]]
+            if duplicate:
+                rejected.append({"row": row, "reason": f"duplicate {', '.join(duplicate)} in this run"})
+                continue
+            
+            for column in seen:
+                if row.get(column):
+                    seen[column].add(row[column])
+            pending.append((lead_key, row))
+        
+        for i in range(0, len(pending), self.store_batch_size):
+            batch = pending[i:i + self.store_batch_size]
+            
             try:
-                # Insert into discovered_agents table
-                result = await self.db.table("discovered_agents").insert({
-                    "name": agent.get("name"),
-                    "slug": agent.get("slug"),
-                    "description": agent.get("description"),
-                    "framework": agent.get("framework"),
-                    "category": agent.get("category"),
-                    "tags": agent.get("tags", []),
-                    "capabilities": agent.get("capabilities", []),
-                    "endpoint_url": agent.get("endpoint_url"),
-                    "source_url": agent.get("source_url"),
-                    "documentation_url": agent.get("documentation_url"),
-                    "contact_email": agent.get("contacts", {}).get("email"),
-                    "github_url": agent.get("contacts", {}).get("github"),
-                    "twitter_handle": agent.get("contacts", {}).get("twitter"),
-                    "confidence_score": agent.get("confidence_score"),
-                    "raw_data": agent.get("raw_data"),
-                    "discovered_by": "discovery_system",
-                    "verified": False
-                }).execute()
-                
-                stored.append(result.data[0])
+                # Upsert the whole batch in one round trip
+                stored_rows = await self._upsert_agents([row for _, row in batch])
                 
             except Exception as e:
-                print(f"Failed to store agent {agent.get('name')}: {e}")
-                continue
+                # One bad row fails the whole batch; retry row by row so
+                # only the bad rows are lost
+                print(f"Failed to store batch of {len(batch)} agents, retrying one at a time: {e}")
+                stored_rows = []
+                for _, row in batch:
+                    try:
+                        stored_rows.extend(await self._upsert_agents([row]))
+                    except Exception as row_error:
+                        rejected.append({"row": row, "reason": str(row_error)})
+            
+            rows_by_key = {
+                row.get(self.store_conflict_key): row for row in stored_rows
+            }
+            
+            for lead_key, row in batch:
+                stored_row = rows_by_key.get(row[self.store_conflict_key])
+                if stored_row is None:
+                    continue
+                
+                stored.append(stored_row)
+                await asyncio.to_thread(
+                    self.checkpoints.save_lead,
+                    state["run_id"], "store_results", lead_key,
+                    {"row": stored_row}
+                )
+        
+        for rejection in rejected:
+            row = rejection["row"]
+            print(f"Rejected agent {row.get('name') or row.get('source_url')!r}: {rejection['reason']}")
         
         state["agents_to_store"] = stored
+        state["rejected_agents"] = rejected
         
         state["thinking_steps"].append({
             "step": len(state["thinking_steps"]) + 1,
             "action": "store_complete",
-            "description": f"Successfully stored {len(stored)} agents",
+            "description": f"Successfully stored {len(stored)} agents, rejected {len(rejected)}",
             "timestamp": datetime.utcnow().isoformat()
         })
         
@@ -494,8 +729,14 @@ class AgentDiscoverySystem:
         })
         
         outreach_list = []
+        done = await asyncio.to_thread(self.checkpoints.load_leads, state["run_id"], "generate_outreach")
         
         for agent in state["agents_to_store"]:
+            lead_key = self._lead_key(agent)
+            if lead_key in done:
+                outreach_list.append(done[lead_key]["outreach"])
+                continue
+            
             # Skip if no contact info
             if not agent.get("contact_email") and not agent.get("github_url"):
                 continue
@@ -528,13 +769,20 @@ class AgentDiscoverySystem:
                     max_tokens=300
                 )
                 
-                outreach_list.append({
+                outreach = {
                     "agent_id": agent.get("id"),
                     "contact_email": agent.get("contact_email"),
                     "github_url": agent.get("github_url"),
                     "message": message,
                     "status": "pending"
-                })
+                }
+                outreach_list.append(outreach)
+                
+                await asyncio.to_thread(
+                    self.checkpoints.save_lead,
+                    state["run_id"], "generate_outreach", lead_key,
+                    {"outreach": outreach}
+                )
                 
             except Exception as e:
                 print(f"Failed to generate outreach for {agent.get('name')}: {e}")
@@ -551,6 +799,43 @@ class AgentDiscoverySystem:
         
         return state
     
+    async def _upsert_agents(self, rows: List[Dict]) -> List[Dict]:
+        """Upsert discovered_agents rows and return them as stored"""
+        result = await self.db.table("discovered_agents").upsert(
+            rows,
+            on_conflict=self.store_conflict_key
+        ).execute()
+        return result.data
+    
+    def _agent_row(self, agent: Dict) -> Dict:
+        """Map a classified agent onto a discovered_agents row"""
+        contacts = agent.get("contacts") or {}
+        
+        return {
+            "name": agent.get("name"),
+            "slug": agent.get("slug") or self._slugify(agent.get("name") or agent.get("source_url") or ""),
+            "description": agent.get("description"),
+            "framework": agent.get("framework"),
+            "category": agent.get("category"),
+            "tags": agent.get("tags", []),
+            "capabilities": agent.get("capabilities", []),
+            "endpoint_url": agent.get("endpoint_url"),
+            "source_url": agent.get("source_url"),
+            "documentation_url": agent.get("documentation_url"),
+            "related_urls": agent.get("related_urls", []),
+            "contact_email": contacts.get("email"),
+            "github_url": contacts.get("github"),
+            "twitter_handle": contacts.get("twitter"),
+            "confidence_score": agent.get("confidence_score"),
+            "raw_data": agent.get("raw_data"),
+            "discovered_by": "discovery_system",
+            "verified": False
+        }
+    
+    def _slugify(self, text: str) -> str:
+        """Build a url-friendly slug"""
+        return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')[:255]
+    
     def _get_default_targets(self) -> List[str]:
         """Get default discovery targets"""
         return [
@@ -601,5 +886,7 @@ if __name__ == "__main__":
         print(f"Found {len(result['classified_agents'])} agents")
         print(f"Stored {len(result['agents_to_store'])} agents")
         print(f"Generated {len(result['outreach_list'])} outreach messages")
+        
+        await system.aclose()
     
     asyncio.run(test_discovery())
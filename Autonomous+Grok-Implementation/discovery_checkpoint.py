@@ -0,0 +1,163 @@
+"""
+Discovery Checkpoint Store - Persist DiscoveryState so failed runs can resume
+"""
+import os
+import json
+import sqlite3
+from contextlib import closing, contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+
+
+class DiscoveryCheckpointStore:
+    """
+    Local SQLite checkpoint store for discovery runs.
+
+    Two levels of checkpoints are kept, both keyed by run_id:
+    - phases: a full DiscoveryState snapshot after each completed phase
+    - leads: the per-lead outcome inside a phase, so a phase interrupted
+      half-way only re-runs the leads it had not finished
+
+    Methods are blocking; call them through asyncio.to_thread from async code.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv(
+            "DISCOVERY_CHECKPOINT_PATH",
+            "discovery_checkpoints.sqlite"
+        )
+        self._init_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits (or rolls back) and is closed on exit"""
+        with closing(sqlite3.connect(self.path)) as conn:
+            with conn:
+                yield conn
+
+    def _init_db(self):
+        """Create checkpoint tables if they don't exist"""
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS run_checkpoints (
+                    run_id TEXT PRIMARY KEY,
+                    phase TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lead_checkpoints (
+                    run_id TEXT NOT NULL,
+                    phase TEXT NOT NULL,
+                    lead_key TEXT NOT NULL,
+                    outcome TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (run_id, phase, lead_key)
+                )
+            """)
+
+    def save_state(self, state: Dict, phase: str):
+        """
+        Snapshot the full discovery state
+
+        Args:
+            state: Current DiscoveryState
+            phase: Name of the last phase that ran
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO run_checkpoints "
+                "(run_id, phase, status, state, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    state["run_id"],
+                    phase,
+                    state.get("status", "running"),
+                    json.dumps(state, default=str),
+                    datetime.utcnow().isoformat()
+                )
+            )
+
+    def load_state(self, run_id: str) -> Optional[Dict]:
+        """
+        Load the latest state snapshot for a run
+
+        Args:
+            run_id: Discovery run ID
+
+        Returns:
+            DiscoveryState dict, or None if the run has no checkpoint
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state FROM run_checkpoints WHERE run_id = ?",
+                (run_id,)
+            ).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def save_lead(self, run_id: str, phase: str, lead_key: str, outcome: Dict):
+        """
+        Record the outcome of one lead within a phase
+
+        Args:
+            run_id: Discovery run ID
+            phase: Phase name
+            lead_key: Stable lead identifier (usually its URL)
+            outcome: Serializable outcome, e.g. {"keep": True, "lead": {...}}
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO lead_checkpoints "
+                "(run_id, phase, lead_key, outcome, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    phase,
+                    lead_key,
+                    json.dumps(outcome, default=str),
+                    datetime.utcnow().isoformat()
+                )
+            )
+
+    def load_leads(self, run_id: str, phase: str) -> Dict[str, Dict]:
+        """
+        Load all recorded lead outcomes for a phase
+
+        Returns:
+            Dictionary mapping lead keys to their outcomes
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT lead_key, outcome FROM lead_checkpoints "
+                "WHERE run_id = ? AND phase = ?",
+                (run_id, phase)
+            ).fetchall()
+
+        return {key: json.loads(outcome) for key, outcome in rows}
+
+    def list_runs(self, status: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """
+        List checkpointed runs
+
+        Args:
+            status: Only include runs with this status (e.g. 'failed')
+
+        Returns:
+            List of (run_id, last_phase, status) tuples, newest first
+        """
+        query = "SELECT run_id, phase, status FROM run_checkpoints"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY updated_at DESC"
+
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchall()
+
+    def clear(self, run_id: str):
+        """Delete all checkpoints for a run"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM run_checkpoints WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM lead_checkpoints WHERE run_id = ?", (run_id,))
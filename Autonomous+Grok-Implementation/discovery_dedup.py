@@ -0,0 +1,164 @@
+"""
+Near-Duplicate Detector - Cluster discovery leads that describe the same agent
+"""
+import re
+import random
+import hashlib
+from collections import defaultdict
+from itertools import combinations
+from typing import List, Dict, Set, Tuple
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_PRIME = (1 << 61) - 1
+
+
+class MinHashLSH:
+    """
+    MinHash signatures with an LSH band index.
+
+    Texts are reduced to word shingles, each shingle set to a fixed-size
+    MinHash signature, and signatures are split into bands so that only
+    leads sharing at least one band bucket are compared. Candidate pairs
+    are confirmed with the estimated Jaccard similarity.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: float = 0.5,
+        shingle_size: int = 3,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        self._signatures: List[Tuple[int, ...]] = []
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+
+    def _shingles(self, text: str) -> Set[int]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        if not tokens:
+            return set()
+        size = min(self.shingle_size, len(tokens))
+
+        return {
+            int.from_bytes(
+                hashlib.blake2b(
+                    " ".join(tokens[i:i + size]).encode(),
+                    digest_size=8
+                ).digest(),
+                "big"
+            )
+            for i in range(len(tokens) - size + 1)
+        }
+
+    def _signature(self, shingles: Set[int]) -> Tuple[int, ...]:
+        if not shingles:
+            return ()
+        return tuple(
+            min((a * h + b) % _PRIME for h in shingles)
+            for a, b in self._perms
+        )
+
+    def add(self, text: str) -> int:
+        """
+        Index a text
+
+        Returns:
+            Position of the text in the index
+        """
+        signature = self._signature(self._shingles(text))
+        index = len(self._signatures)
+        self._signatures.append(signature)
+
+        # Empty texts are never bucketed, so they stay singleton clusters
+        if not signature:
+            return index
+
+        for band in range(self.bands):
+            start = band * self.rows
+            self._buckets[(band, signature[start:start + self.rows])].append(index)
+
+        return index
+
+    def similarity(self, i: int, j: int) -> float:
+        """Estimated Jaccard similarity of two indexed texts"""
+        a, b = self._signatures[i], self._signatures[j]
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+    def clusters(self) -> List[List[int]]:
+        """
+        Group indexed texts whose similarity meets the threshold
+
+        Returns:
+            Clusters of positions, in first-seen order
+        """
+        parent = list(range(len(self._signatures)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for members in self._buckets.values():
+            for i, j in combinations(members, 2):
+                if find(i) != find(j) and self.similarity(i, j) >= self.threshold:
+                    parent[find(j)] = find(i)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(parent)):
+            groups.setdefault(find(i), []).append(i)
+
+        return list(groups.values())
+
+
+def lead_text(lead: Dict, max_chars: int = 5000) -> str:
+    """Text used to fingerprint a lead: title, snippet and scraped markdown"""
+    scraped = lead.get("scraped_content") or {}
+
+    return " ".join([
+        lead.get("title") or "",
+        lead.get("snippet") or "",
+        (scraped.get("markdown") or "")[:max_chars]
+    ])
+
+
+def cluster_near_duplicates(leads: List[Dict], threshold: float = 0.5) -> List[List[Dict]]:
+    """
+    Cluster leads that describe the same agent
+
+    Args:
+        leads: Discovery leads (search results, optionally with scraped content)
+        threshold: Minimum estimated Jaccard similarity to merge two leads
+
+    Returns:
+        List of clusters; the first lead of each cluster is its representative
+        (the one with the most scraped content)
+    """
+    index = MinHashLSH(threshold=threshold)
+    for lead in leads:
+        index.add(lead_text(lead))
+
+    clusters = []
+    for members in index.clusters():
+        cluster = [leads[i] for i in members]
+        cluster.sort(
+            key=lambda lead: len((lead.get("scraped_content") or {}).get("markdown") or ""),
+            reverse=True
+        )
+        clusters.append(cluster)
+
+    return clusters
@@ -2,11 +2,120 @@
 Firecrawl Tool - Deep content extraction from web pages
 """
 import os
+import asyncio
+import inspect
 import httpx
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Callable, Awaitable, AsyncIterator
 from datetime import datetime
 
+from backend.tools.http_client import create_async_client
+from backend.tools.adaptive_limiter import parse_retry_after
+from backend.tools.crawl_webhooks import CrawlWebhookReceiver
+from backend.tools.scrape_cache import ScrapeCache
+
+
+# Contact extraction is driven by one scan for literal triggers ('@' and the
+# social domains); emails and handles are then matched in place around each
+# hit. This keeps the single pass on the regex engine's fast literal search
+# instead of trying a character-class prefix at every position of the page.
+_CONTACT_TRIGGER = re.compile(r'@|github\.com/|twitter\.com/|linkedin\.com/(?:in|company)/')
+_EMAIL_DOMAIN = re.compile(r'[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+_HANDLE = re.compile(r'[a-zA-Z0-9_]+')
+_SLUG = re.compile(r'[a-zA-Z0-9_-]+')
+_EMAIL_LOCAL_CHARS = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789._%+-"
+)
+_WORD_CHARS = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_"
+)
+
+
+def _email_at(content: str, at: int) -> Optional[str]:
+    """Return the email whose '@' is at position `at`, if any"""
+    start = at
+    while start > 0 and content[start - 1] in _EMAIL_LOCAL_CHARS:
+        start -= 1
+    
+    # Local part must begin on a word boundary
+    while start < at and content[start] not in _WORD_CHARS:
+        start += 1
+    if start == at:
+        return None
+    
+    domain = _EMAIL_DOMAIN.match(content, at + 1)
+    return content[start:domain.end()] if domain else None
+
+
+def extract_contacts(content: str, max_emails: int = 10) -> Dict:
+    """
+    Extract contact information in a single pass over the content
+    
+    Scanning stops as soon as GitHub, Twitter, LinkedIn and at least one
+    email have been found; the rest of the page is not scanned for more
+    emails.
+    
+    Args:
+        content: Markdown content
+        max_emails: Maximum number of distinct emails to collect
+        
+    Returns:
+        Dictionary of extracted contacts (emails deduplicated in page order)
+    """
+    
+    contacts = {
+        "emails": [],
+        "github": None,
+        "twitter": None,
+        "linkedin": None,
+        "website": None
+    }
+    
+    emails = {}  # Ordered set
+    
+    for match in _CONTACT_TRIGGER.finditer(content):
+        trigger = match.group()
+        end = match.end()
+        
+        if trigger == "@":
+            email = _email_at(content, match.start())
+            if email:
+                if len(emails) < max_emails:
+                    emails[email] = None
+            elif contacts["twitter"] is None:
+                handle = _HANDLE.match(content, end)
+                if handle:
+                    contacts["twitter"] = f"https://twitter.com/{handle.group()}"
+        
+        elif trigger == "github.com/":
+            if contacts["github"] is None:
+                slug = _SLUG.match(content, end)
+                if slug:
+                    contacts["github"] = f"https://github.com/{slug.group()}"
+        
+        elif trigger == "twitter.com/":
+            if contacts["twitter"] is None:
+                handle = _HANDLE.match(content, end)
+                if handle:
+                    contacts["twitter"] = f"https://twitter.com/{handle.group()}"
+        
+        elif contacts["linkedin"] is None:
+            slug = _SLUG.match(content, end)
+            if slug:
+                contacts["linkedin"] = f"https://linkedin.com/in/{slug.group()}"
+        
+        if (
+            emails
+            and contacts["github"]
+            and contacts["twitter"]
+            and contacts["linkedin"]
+        ):
+            break
+    
+    contacts["emails"] = list(emails)
+    
+    return contacts
+
 
 class FirecrawlTool:
     """
@@ -14,12 +123,79 @@ class FirecrawlTool:
     Handles JavaScript-heavy sites, structured data extraction, and contact info.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_connections: int = 10,
+        timeout: float = 60.0,
+        webhook_receiver: Optional[CrawlWebhookReceiver] = None,
+        webhook_url: Optional[str] = None,
+        poll_initial_interval: float = 0.5,
+        poll_max_interval: float = 10.0,
+        poll_growth: float = 1.5,
+        cache: Optional[ScrapeCache] = None
+    ):
         self.api_key = api_key or os.getenv("FIRECRAWL_API_KEY")
         if not self.api_key:
             raise ValueError("FIRECRAWL_API_KEY environment variable not set")
         
         self.base_url = "https://api.firecrawl.dev/v1"
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._origin_client: Optional[httpx.AsyncClient] = None
+        
+        # Repeat scrapes are served locally when a cache is configured
+        self.cache = cache
+        
+        # Crawl completion: webhook push when configured, adaptive polling otherwise
+        self.webhook_receiver = webhook_receiver
+        self.webhook_url = webhook_url or os.getenv("FIRECRAWL_WEBHOOK_URL")
+        self.poll_initial_interval = poll_initial_interval
+        self.poll_max_interval = poll_max_interval
+        self.poll_growth = poll_growth
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = create_async_client(
+                self.base_url,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=self.timeout,
+                max_connections=self.max_connections,
+                service="firecrawl"
+            )
+        return self._client
+    
+    @property
+    def origin_client(self) -> httpx.AsyncClient:
+        """Client for cheap HEAD requests to scraped sites (no Firecrawl auth)"""
+        if self._origin_client is None or self._origin_client.is_closed:
+            self._origin_client = httpx.AsyncClient(
+                headers={"User-Agent": "Aletheia-Discovery/1.0"},
+                timeout=httpx.Timeout(5.0),
+                follow_redirects=True
+            )
+        return self._origin_client
+    
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._origin_client is not None:
+            await self._origin_client.aclose()
+            self._origin_client = None
+    
+    async def __aenter__(self) -> "FirecrawlTool":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
         
     async def scrape(
         self,
@@ -41,41 +217,105 @@ class FirecrawlTool:
             Scraped content with metadata and contacts
         """
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/scrape",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "url": url,
-                    "formats": ["markdown"] if include_markdown else [],
-                    "onlyMainContent": True,
-                    "waitFor": 2000  # Wait for JS to load
-                },
-                timeout=60.0
+        options = {
+            "formats": ["markdown"] if include_markdown else [],
+            "onlyMainContent": True,
+            "waitFor": 2000  # Wait for JS to load
+        }
+        
+        data = await self._cached_scrape(url, options) if self.cache else None
+        from_cache = data is not None
+        
+        if data is None:
+            response = await self.client.post(
+                "/scrape",
+                json={"url": url, **options}
             )
             
             response.raise_for_status()
-            data = response.json()
-            
-            # Extract base data
-            result = {
-                "url": url,
-                "markdown": data.get("markdown", ""),
-                "metadata": data.get("metadata", {}),
+            payload = response.json()
+            data = {
+                "markdown": payload.get("markdown", ""),
+                "metadata": payload.get("metadata", {}),
                 "scraped_at": datetime.utcnow().isoformat()
             }
             
-            # Extract contacts if requested
-            if extract_contacts:
-                result["contacts"] = self._extract_contacts(
-                    data.get("markdown", ""),
-                    data.get("metadata", {})
-                )
-            
-            return result
+            if self.cache:
+                etag, last_modified = await self._origin_validators(url)
+                await asyncio.to_thread(self.cache.put, url, options, data, etag, last_modified)
+        
+        # Extract base data
+        result = {
+            "url": url,
+            "markdown": data["markdown"],
+            "metadata": data["metadata"],
+            "scraped_at": data["scraped_at"],
+            "from_cache": from_cache
+        }
+        
+        # Extract contacts if requested
+        if extract_contacts:
+            result["contacts"] = self._extract_contacts(
+                data["markdown"],
+                data["metadata"]
+            )
+        
+        return result
+    
+    async def _cached_scrape(self, url: str, options: Dict) -> Optional[Dict]:
+        """
+        Serve a scrape from the cache when possible
+        
+        Fresh entries are returned as-is. Expired entries are revalidated
+        against the origin with If-None-Match/If-Modified-Since; a 304 extends
+        the entry instead of paying for a new Firecrawl scrape.
+        
+        Returns:
+            Cached scrape data, or None if the page must be scraped again
+        """
+        entry = await asyncio.to_thread(self.cache.get, url, options)
+        if entry is None:
+            return None
+        
+        if entry.fresh:
+            return entry.data
+        
+        if not (entry.etag or entry.last_modified):
+            return None
+        
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        
+        try:
+            response = await self.origin_client.head(url, headers=headers)
+        except httpx.HTTPError:
+            return None
+        
+        if response.status_code == 304:
+            await asyncio.to_thread(self.cache.refresh, entry)
+            return entry.data
+        
+        return None
+    
+    async def _origin_validators(self, url: str):
+        """
+        Fetch the origin's ETag/Last-Modified for later revalidation
+        
+        Returns:
+            (etag, last_modified), either may be None
+        """
+        try:
+            response = await self.origin_client.head(url)
+        except httpx.HTTPError:
+            return None, None
+        
+        if response.status_code >= 400:
+            return None, None
+        
+        return response.headers.get("ETag"), response.headers.get("Last-Modified")
     
     def _extract_contacts(self, content: str, metadata: Dict) -> Dict:
         """
@@ -88,119 +328,236 @@ class FirecrawlTool:
         Returns:
             Dictionary of extracted contacts
         """
-        
-        contacts = {
-            "emails": [],
-            "github": None,
-            "twitter": None,
-            "linkedin": None,
-            "website": None
-        }
-        
-        # Extract emails
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, content)
-        contacts["emails"] = list(set(emails))  # Remove duplicates
-        
-        # Extract GitHub URLs
-        github_pattern = r'github\.com/([a-zA-Z0-9_-]+)'
-        github_matches = re.findall(github_pattern, content)
-        if github_matches:
-            contacts["github"] = f"https://github.com/{github_matches[0]}"
-        
-        # Extract Twitter handles
-        twitter_pattern = r'(?:twitter\.com/|@)([a-zA-Z0-9_]+)'
-        twitter_matches = re.findall(twitter_pattern, content)
-        if twitter_matches:
-            contacts["twitter"] = f"https://twitter.com/{twitter_matches[0]}"
-        
-        # Extract LinkedIn
-        linkedin_pattern = r'linkedin\.com/(?:in|company)/([a-zA-Z0-9_-]+)'
-        linkedin_matches = re.findall(linkedin_pattern, content)
-        if linkedin_matches:
-            contacts["linkedin"] = f"https://linkedin.com/in/{linkedin_matches[0]}"
-        
-        return contacts
+        return extract_contacts(content)
     
     async def crawl_site(
         self,
         base_url: str,
         max_pages: int = 10,
         include_paths: Optional[List[str]] = None,
-        exclude_paths: Optional[List[str]] = None
+        exclude_paths: Optional[List[str]] = None,
+        on_page: Optional[Callable[[Dict], Optional[Awaitable[None]]]] = None,
+        max_wait: float = 150.0
     ) -> List[Dict]:
         """
         Crawl multiple pages from a website
         
+        Collects iter_crawl_pages into a list; prefer iterating directly
+        when pages can be processed one at a time.
+        
         Args:
             base_url: Base URL to start crawling from
             max_pages: Maximum number of pages to crawl
             include_paths: Only crawl URLs matching these patterns
             exclude_paths: Skip URLs matching these patterns
+            on_page: Called (or awaited) with each processed page as it arrives
+            max_wait: Seconds to wait for the crawl to complete
             
         Returns:
             List of scraped pages
         """
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/crawl",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "url": base_url,
-                    "limit": max_pages,
-                    "scrapeOptions": {
-                        "formats": ["markdown"],
-                        "onlyMainContent": True
-                    },
-                    "includePaths": include_paths or [],
-                    "excludePaths": exclude_paths or []
-                },
-                timeout=180.0
-            )
-            
-            response.raise_for_status()
-            data = response.json()
+        results = []
+        
+        async for page in self.iter_crawl_pages(
+            base_url,
+            max_pages=max_pages,
+            include_paths=include_paths,
+            exclude_paths=exclude_paths,
+            max_wait=max_wait
+        ):
+            results.append(page)
             
-            # Get crawl ID
-            crawl_id = data.get("id")
+            if on_page is not None:
+                maybe_awaitable = on_page(page)
+                if inspect.isawaitable(maybe_awaitable):
+                    await maybe_awaitable
+        
+        return results
+    
+    async def iter_crawl_pages(
+        self,
+        base_url: str,
+        max_pages: int = 10,
+        include_paths: Optional[List[str]] = None,
+        exclude_paths: Optional[List[str]] = None,
+        max_wait: float = 150.0
+    ) -> AsyncIterator[Dict]:
+        """
+        Crawl a website and yield each page as soon as it is available
+        
+        Completion is detected from webhook events when a receiver is
+        configured, otherwise by adaptive polling. Pages are yielded as they
+        show up in a webhook or a partial status response, and paginated
+        results (`next` links on large crawls) are followed on completion.
+        
+        Args:
+            base_url: Base URL to start crawling from
+            max_pages: Maximum number of pages to crawl
+            include_paths: Only crawl URLs matching these patterns
+            exclude_paths: Skip URLs matching these patterns
+            max_wait: Seconds to wait for the crawl to complete
             
-            # Poll for completion
-            max_attempts = 30
-            for _ in range(max_attempts):
-                import asyncio
-                await asyncio.sleep(5)  # Wait 5 seconds between polls
+        Yields:
+            Scraped pages, each exactly once
+        """
+        
+        payload = {
+            "url": base_url,
+            "limit": max_pages,
+            "scrapeOptions": {
+                "formats": ["markdown"],
+                "onlyMainContent": True
+            },
+            "includePaths": include_paths or [],
+            "excludePaths": exclude_paths or []
+        }
+        
+        use_webhook = self.webhook_receiver is not None and self.webhook_url
+        if use_webhook:
+            payload["webhook"] = {
+                "url": self.webhook_url,
+                "events": ["page", "completed", "failed"]
+            }
+        
+        response = await self.client.post("/crawl", json=payload, timeout=180.0)
+        
+        response.raise_for_status()
+        data = response.json()
+        
+        # Get crawl ID
+        crawl_id = data.get("id")
+        
+        # Only URLs are remembered, so memory stays flat however big the crawl
+        seen_urls = set()
+        
+        events = self.webhook_receiver.register(crawl_id) if use_webhook else None
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + max_wait
+        interval = self.poll_initial_interval
+        
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError("Crawl did not complete in time")
+                wait = min(interval, remaining)
                 
-                status_response = await client.get(
-                    f"{self.base_url}/crawl/{crawl_id}",
-                    headers={"Authorization": f"Bearer {self.api_key}"}
-                )
+                if events is not None:
+                    # Push path: the poll below only runs if no event arrives in time
+                    try:
+                        event = await asyncio.wait_for(events.get(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        event = None
+                    
+                    if event is not None:
+                        event_type = event.get("type", "")
+                        for page in self._new_pages(event.get("data") or [], seen_urls):
+                            yield page
+                        
+                        if event_type.endswith("failed"):
+                            raise RuntimeError(f"Crawl failed: {event.get('error')}")
+                        if not event_type.endswith("completed"):
+                            continue
+                else:
+                    await asyncio.sleep(wait)
                 
+                status_response = await self.client.get(f"/crawl/{crawl_id}")
+                
+                if status_response.status_code == 429:
+                    retry_after = parse_retry_after(status_response.headers.get("Retry-After"))
+                    interval = retry_after if retry_after is not None else interval * self.poll_growth
+                    continue
+                
+                status_response.raise_for_status()
                 status_data = status_response.json()
                 
-                if status_data.get("status") == "completed":
-                    pages = status_data.get("data", [])
-                    
-                    # Process each page
-                    results = []
-                    for page in pages:
-                        results.append({
-                            "url": page.get("url"),
-                            "markdown": page.get("markdown", ""),
-                            "metadata": page.get("metadata", {}),
-                            "contacts": self._extract_contacts(
-                                page.get("markdown", ""),
-                                page.get("metadata", {})
-                            ),
-                            "scraped_at": datetime.utcnow().isoformat()
-                        })
-                    
-                    return results
-            
-            raise TimeoutError("Crawl did not complete in time")
+                # Partially completed crawls already return the pages done so far
+                for page in self._new_pages(status_data.get("data", []), seen_urls):
+                    yield page
+                
+                status = status_data.get("status")
+                if status == "failed":
+                    raise RuntimeError(f"Crawl failed: {status_data.get('error')}")
+                
+                if status == "completed":
+                    # Large crawls are split across result pages linked by `next`
+                    next_url = status_data.get("next")
+                    while next_url:
+                        next_response = await self.client.get(next_url)
+                        next_response.raise_for_status()
+                        next_data = next_response.json()
+                        
+                        for page in self._new_pages(next_data.get("data", []), seen_urls):
+                            yield page
+                        
+                        next_url = next_data.get("next")
+                    return
+                
+                interval = self._next_poll_interval(
+                    interval,
+                    status_response.headers.get("Retry-After"),
+                    status_data,
+                    loop.time() - started
+                )
+        finally:
+            if events is not None:
+                self.webhook_receiver.unregister(crawl_id)
+    
+    def _new_pages(self, pages: List[Dict], seen_urls: set) -> List[Dict]:
+        """Process the pages not yielded yet"""
+        new_pages = []
+        
+        for page in pages:
+            page_url = page.get("url") or page.get("metadata", {}).get("sourceURL")
+            if page_url in seen_urls:
+                continue
+            seen_urls.add(page_url)
+            new_pages.append(self._process_page(page))
+        
+        return new_pages
+    
+    def _next_poll_interval(
+        self,
+        interval: float,
+        retry_after: Optional[str],
+        status_data: Dict,
+        elapsed: float
+    ) -> float:
+        """
+        Pick the next crawl status poll delay
+        
+        A server-provided Retry-After wins. Otherwise the interval grows
+        exponentially, but never beyond the remaining time estimated from
+        crawl progress (completed/total pages so far).
+        """
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            return server_delay
+        
+        next_interval = min(interval * self.poll_growth, self.poll_max_interval)
+        
+        completed = status_data.get("completed") or 0
+        total = status_data.get("total") or 0
+        if completed and total > completed:
+            eta = elapsed / completed * (total - completed)
+            next_interval = min(next_interval, max(eta, self.poll_initial_interval))
+        
+        return next_interval
+    
+    def _process_page(self, page: Dict) -> Dict:
+        """Normalize a crawled page and extract its contacts"""
+        return {
+            "url": page.get("url") or page.get("metadata", {}).get("sourceURL"),
+            "markdown": page.get("markdown", ""),
+            "metadata": page.get("metadata", {}),
+            "contacts": self._extract_contacts(
+                page.get("markdown", ""),
+                page.get("metadata", {})
+            ),
+            "scraped_at": datetime.utcnow().isoformat()
+        }
     
     async def extract_github_repo_info(self, github_url: str) -> Dict:
         """
@@ -242,51 +599,70 @@ class FirecrawlTool:
         
         return repo_info
     
-    async def extract_docs_site(self, docs_url: str) -> Dict:
+    async def extract_docs_site(
+        self,
+        docs_url: str,
+        max_content_chars: int = 500_000
+    ) -> Dict:
         """
         Extract information from a documentation site
         
+        Pages are aggregated as they stream in; content is collected in
+        chunks and joined once, and stops growing at max_content_chars.
+        
         Args:
             docs_url: Documentation site URL
+            max_content_chars: Upper bound on the aggregated content size
             
         Returns:
             Documentation content and structure
         """
         
-        # Crawl the docs site
-        pages = await self.crawl_site(
-            docs_url,
-            max_pages=20,
-            include_paths=["/docs", "/api", "/guide"],
-            exclude_paths=["/blog", "/community"]
-        )
-        
         # Aggregate information
         docs_info = {
             "base_url": docs_url,
-            "pages_count": len(pages),
+            "pages_count": 0,
             "content": "",
+            "content_truncated": False,
             "api_endpoints": [],
             "examples": [],
             "contacts": {}
         }
         
-        # Combine content from all pages
-        for page in pages:
-            docs_info["content"] += f"\n\n## {page['url']}\n\n{page['markdown']}"
+        chunks = []
+        remaining = max_content_chars
+        
+        # Crawl the docs site, combining content page by page
+        async for page in self.iter_crawl_pages(
+            docs_url,
+            max_pages=20,
+            include_paths=["/docs", "/api", "/guide"],
+            exclude_paths=["/blog", "/community"]
+        ):
+            docs_info["pages_count"] += 1
+            
+            if remaining > 0:
+                chunk = f"\n\n## {page['url']}\n\n{page['markdown']}"
+                if len(chunk) > remaining:
+                    chunk = chunk[:remaining]
+                    docs_info["content_truncated"] = True
+                chunks.append(chunk)
+                remaining -= len(chunk)
+            else:
+                docs_info["content_truncated"] = True
             
             # Merge contacts
             for key, value in page.get("contacts", {}).items():
                 if value and not docs_info["contacts"].get(key):
                     docs_info["contacts"][key] = value
         
+        docs_info["content"] = "".join(chunks)
+        
         return docs_info
 
 
 # Example usage
 if __name__ == "__main__":
-    import asyncio
-    
     async def test_firecrawl():
         tool = FirecrawlTool()
         
@@ -316,5 +692,7 @@ if __name__ == "__main__":
         print(f"Crawled {len(pages)} pages")
         for page in pages:
             print(f"  - {page['url']}")
+        
+        await tool.aclose()
     
     asyncio.run(test_firecrawl())
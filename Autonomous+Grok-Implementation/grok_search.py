@@ -2,9 +2,26 @@
 Grok Search Tool - Fast web search for initial discovery sweep
 """
 import os
+import asyncio
 import httpx
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 from datetime import datetime
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+from backend.tools.http_client import create_async_client
+from backend.tools.adaptive_limiter import AIMDLimiter, backoff_delay, parse_retry_after
+from backend.tools.llm_json import generate_json
+
+
+class GrokResult(BaseModel):
+    """One search result as returned by Grok"""
+    
+    model_config = ConfigDict(extra="allow")
+    
+    url: str
+    title: str = ""
+    snippet: str = ""
+    relevance_score: float = 0.0
 
 
 class GrokSearchTool:
@@ -13,13 +30,58 @@ class GrokSearchTool:
     Uses X.AI's Grok model with native web search capabilities.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_connections: int = 10,
+        timeout: float = 60.0,
+        max_concurrency: int = 8,
+        max_retries: int = 4
+    ):
         self.api_key = api_key or os.getenv("GROK_API_KEY")
         if not self.api_key:
             raise ValueError("GROK_API_KEY environment variable not set")
         
         self.base_url = "https://api.x.ai/v1"
         self.model = "grok-beta"
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Starts at half the cap and adapts to the provider's sustainable rate
+        self.limiter = AIMDLimiter(
+            initial_limit=max(1, max_concurrency // 2),
+            max_limit=max_concurrency
+        )
+        self.max_retries = max_retries
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = create_async_client(
+                self.base_url,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=self.timeout,
+                max_connections=self.max_connections,
+                service="grok"
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def __aenter__(self) -> "GrokSearchTool":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
         
     async def search(
         self, 
@@ -67,55 +129,59 @@ class GrokSearchTool:
         - Product pages
         """
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.model,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a web search specialist. Use your web search capabilities to find relevant results."
-                        },
-                        {
-                            "role": "user",
-                            "content": search_prompt
-                        }
-                    ],
-                    "temperature": 0.1,  # Low temperature for factual search
-                },
-                timeout=60.0
-            )
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            # Extract results from response
-            content = data["choices"][0]["message"]["content"]
-            
-            # Parse JSON from response
-            import json
-            import re
-            
-            # Extract JSON array from markdown code blocks if present
-            json_match = re.search(r'```json\n(.*?)\n```', content, re.DOTALL)
-            if json_match:
-                results = json.loads(json_match.group(1))
-            else:
-                # Try parsing directly
-                results = json.loads(content)
-            
-            # Add metadata
-            for result in results:
-                result['search_query'] = query
-                result['discovered_at'] = datetime.utcnow().isoformat()
-                result['source'] = 'grok'
-            
-            return results[:max_results]
+        # Only the array shape is required here; items are validated one by
+        # one below so a single malformed result doesn't discard the rest
+        items = await generate_json(
+            self._complete,
+            search_prompt,
+            List[Dict[str, Any]],
+            temperature=0.1  # Low temperature for factual search
+        )
+        
+        results = []
+        for raw in items:
+            try:
+                results.append(GrokResult.model_validate(raw))
+            except ValidationError as e:
+                print(f"Skipping invalid Grok result for '{query}': {e.errors()[0]['msg']}")
+        
+        # Add metadata
+        discovered_at = datetime.utcnow().isoformat()
+        output = []
+        for result in results[:max_results]:
+            item = result.model_dump()
+            item['search_query'] = query
+            item['discovered_at'] = discovered_at
+            item['source'] = 'grok'
+            output.append(item)
+        
+        return output
+    
+    async def _complete(self, prompt: str, temperature: float = 0.1) -> str:
+        """Run one Grok chat completion and return the message text"""
+        
+        response = await self.client.post(
+            "/chat/completions",
+            json={
+                "model": self.model,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": "You are a web search specialist. Use your web search capabilities to find relevant results."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                "temperature": temperature,
+            }
+        )
+        
+        response.raise_for_status()
+        data = response.json()
+        
+        return data["choices"][0]["message"]["content"]
     
     async def bulk_search(
         self,
@@ -130,28 +196,91 @@ class GrokSearchTool:
             max_results_per_query: Max results per query
             
         Returns:
-            Dictionary mapping queries to their results
+            Dictionary mapping queries to their results (failed queries omitted,
+            see bulk_search_detailed for per-query outcomes)
         """
-        import asyncio
+        outcomes = await self.bulk_search_detailed(queries, max_results_per_query)
         
-        async def search_with_query(query: str):
-            return query, await self.search(query, max_results_per_query)
+        return {
+            query: outcome["results"]
+            for query, outcome in outcomes.items()
+            if outcome["status"] == "ok"
+        }
+    
+    async def bulk_search_detailed(
+        self,
+        queries: List[str],
+        max_results_per_query: int = 20
+    ) -> Dict[str, Dict]:
+        """
+        Execute multiple searches with bounded, adaptive concurrency
         
-        # Execute searches concurrently
-        tasks = [search_with_query(q) for q in queries]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        Concurrency is governed by the tool's AIMD limiter; throttled or
+        transiently failing queries are retried with Retry-After-aware
+        exponential backoff.
         
-        # Build results dictionary
-        search_results = {}
-        for result in results:
-            if isinstance(result, Exception):
-                print(f"Search failed: {result}")
-                continue
+        Args:
+            queries: List of search queries
+            max_results_per_query: Max results per query
+            
+        Returns:
+            Dictionary mapping each query to its outcome:
+            {"status": "ok"|"failed", "results": [...], "attempts": n, "error": str|None}
+        """
+        tasks = [
+            self._search_with_retry(query, max_results_per_query)
+            for query in queries
+        ]
+        outcomes = await asyncio.gather(*tasks)
+        
+        return dict(zip(queries, outcomes))
+    
+    async def _search_with_retry(self, query: str, max_results: int) -> Dict:
+        """Run one search under the limiter, retrying throttled/transient failures"""
+        
+        error = None
+        
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
             
-            query, data = result
-            search_results[query] = data
+            async with self.limiter.slot():
+                try:
+                    results = await self.search(query, max_results)
+                    self.limiter.on_success()
+                    return {
+                        "status": "ok",
+                        "results": results,
+                        "attempts": attempt + 1,
+                        "error": None
+                    }
+                
+                except httpx.HTTPStatusError as e:
+                    error = e
+                    status = e.response.status_code
+                    if status == 429 or status == 503:
+                        self.limiter.on_throttle()
+                        retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                    elif status < 500:
+                        break  # Client errors won't succeed on retry
+                
+                except httpx.TransportError as e:
+                    error = e
+                
+                except Exception as e:
+                    # Unparseable model output and the like: not retryable
+                    error = e
+                    break
+            
+            if attempt < self.max_retries:
+                # Sleep outside the slot so other queries keep flowing
+                await asyncio.sleep(backoff_delay(attempt, retry_after))
         
-        return search_results
+        return {
+            "status": "failed",
+            "results": [],
+            "attempts": attempt + 1,
+            "error": f"{type(error).__name__}: {error}"
+        }
     
     async def targeted_agent_search(
         self,
@@ -205,8 +334,6 @@ class GrokSearchTool:
 
 # Example usage
 if __name__ == "__main__":
-    import asyncio
-    
     async def test_grok_search():
         tool = GrokSearchTool()
         
@@ -236,5 +363,7 @@ if __name__ == "__main__":
         bulk_results = await tool.bulk_search(queries, max_results_per_query=5)
         for query, results in bulk_results.items():
             print(f"{query}: {len(results)} results")
+        
+        await tool.aclose()
     
     asyncio.run(test_grok_search())
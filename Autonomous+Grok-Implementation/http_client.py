@@ -0,0 +1,75 @@
+"""
+Shared HTTP client factory - Pooled httpx.AsyncClient for discovery tools
+"""
+import time
+import httpx
+from typing import Dict, Optional
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    from backend.tracing import observe
+    TRACING_AVAILABLE = True
+except ImportError:
+    TRACING_AVAILABLE = False
+
+
+def _timing_hooks(service: str) -> Dict:
+    """
+    httpx event hooks that time each request into the "<service>.http" span
+
+    Duration runs until response headers arrive; statuses of 400 and
+    above are recorded as errors.
+    """
+    async def on_request(request: httpx.Request):
+        request.extensions["trace_started"] = time.perf_counter()
+
+    async def on_response(response: httpx.Response):
+        started = response.request.extensions.get("trace_started")
+        if started is not None:
+            status = "error" if response.status_code >= 400 else "ok"
+            observe(f"{service}.http", time.perf_counter() - started, status)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def create_async_client(
+    base_url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 60.0,
+    connect_timeout: float = 10.0,
+    max_connections: int = 10,
+    max_keepalive_connections: int = 5,
+    service: Optional[str] = None
+) -> httpx.AsyncClient:
+    """
+    Build a long-lived client that reuses connections across calls
+
+    Args:
+        base_url: API base URL, requests then use relative paths
+        headers: Default headers (auth, content type)
+        timeout: Default read/write/pool timeout in seconds
+        connect_timeout: TCP/TLS connect timeout in seconds
+        max_connections: Maximum concurrent connections to the host
+        max_keepalive_connections: Idle connections kept open for reuse
+        service: Name for request timing metrics (recorded when the
+            backend tracing module is available)
+
+    Returns:
+        AsyncClient using HTTP/2 when the h2 package is installed
+    """
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers or {},
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        event_hooks=_timing_hooks(service) if service and TRACING_AVAILABLE else None
+    )
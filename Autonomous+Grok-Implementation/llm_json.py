@@ -0,0 +1,166 @@
+"""
+LLM JSON Extraction - Pull validated JSON out of free-form model output
+"""
+import re
+import json
+from typing import Any, Awaitable, Callable, Iterator, Optional, Union
+
+from pydantic import TypeAdapter, ValidationError
+
+
+# Characters that matter to bracket balancing outside / inside strings
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_STRING_TOKEN = re.compile(r'\\.|"', re.DOTALL)
+_OPENERS = re.compile(r'[\[{]')
+_CLOSERS = {"}": "{", "]": "["}
+
+Schema = Union[type, TypeAdapter]
+
+
+class LLMJSONError(ValueError):
+    """Model output contained no JSON value matching the expected schema"""
+
+    def __init__(self, message: str, output: str):
+        super().__init__(message)
+        self.output = output
+
+
+def _balanced_end(text: str, start: int) -> Optional[int]:
+    """
+    Find the end of the JSON value opening at `start`
+
+    Returns:
+        Index just past the matching close bracket, or None if the brackets
+        never balance (truncated or malformed output)
+    """
+    stack = []
+    pos = start
+
+    while True:
+        match = _STRUCTURAL.search(text, pos)
+        if match is None:
+            return None
+
+        char = match.group()
+        pos = match.end()
+
+        if char == '"':
+            # Skip the string body, honoring escapes
+            while True:
+                token = _STRING_TOKEN.search(text, pos)
+                if token is None:
+                    return None
+                pos = token.end()
+                if token.group() == '"':
+                    break
+        elif char in "[{":
+            stack.append(char)
+        else:
+            if not stack or stack.pop() != _CLOSERS[char]:
+                return None
+            if not stack:
+                return pos
+
+
+def iter_json_values(text: str) -> Iterator[Any]:
+    """
+    Yield every parseable JSON object/array embedded in text
+
+    Tolerates code fences, leading prose and trailing commentary: each
+    '{' or '[' is tried as the start of a balanced value, outermost first.
+    """
+    pos = 0
+
+    while True:
+        opener = _OPENERS.search(text, pos)
+        if opener is None:
+            return
+
+        start = opener.start()
+        end = _balanced_end(text, start)
+        pos = start + 1
+
+        if end is None:
+            continue
+
+        try:
+            yield json.loads(text[start:end])
+        except json.JSONDecodeError:
+            continue
+
+
+def _adapter(schema: Schema) -> TypeAdapter:
+    return schema if isinstance(schema, TypeAdapter) else TypeAdapter(schema)
+
+
+def parse_llm_json(text: str, schema: Schema) -> Any:
+    """
+    Extract the first embedded JSON value that validates against schema
+
+    Args:
+        text: Raw model output
+        schema: Pydantic model, type (e.g. List[Model]) or TypeAdapter
+
+    Returns:
+        Validated value (model instances for pydantic models)
+
+    Raises:
+        LLMJSONError: If no embedded value validates
+    """
+    adapter = _adapter(schema)
+    last_error = "no JSON object or array found"
+
+    for value in iter_json_values(text):
+        try:
+            return adapter.validate_python(value)
+        except ValidationError as e:
+            last_error = str(e)
+
+    raise LLMJSONError(last_error, text)
+
+
+def _repair_prompt(output: str, schema: Schema, error: str) -> str:
+    schema_json = json.dumps(_adapter(schema).json_schema())
+    return (
+        "Convert the text below into valid JSON matching this JSON schema. "
+        "Respond with the JSON only: no prose, no code fences.\n\n"
+        f"SCHEMA:\n{schema_json}\n\n"
+        f"PROBLEM:\n{error[:500]}\n\n"
+        f"TEXT:\n{output[:4000]}"
+    )
+
+
+async def generate_json(
+    generate: Callable[..., Awaitable[str]],
+    prompt: str,
+    schema: Schema,
+    **kwargs
+) -> Any:
+    """
+    Call an LLM and return validated JSON, with one repair retry
+
+    If the first output has no valid JSON, the model is asked once to
+    rewrite its own output to the schema at temperature 0, which is far
+    cheaper than re-running the original task.
+
+    Args:
+        generate: Async completion function called as generate(prompt, **kwargs)
+        prompt: Task prompt
+        schema: Pydantic model, type or TypeAdapter the result must match
+        **kwargs: Passed through to generate (temperature, max_tokens...)
+
+    Returns:
+        Validated value
+
+    Raises:
+        LLMJSONError: If the repaired output still doesn't validate
+    """
+    output = await generate(prompt, **kwargs)
+
+    try:
+        return parse_llm_json(output, schema)
+    except LLMJSONError as e:
+        repair_kwargs = {**kwargs, "temperature": 0.0}
+        repaired = await generate(_repair_prompt(output, schema, str(e)), **repair_kwargs)
+
+    return parse_llm_json(repaired, schema)
@@ -22,6 +22,7 @@ CREATE TABLE IF NOT EXISTS discovered_agents (
     endpoint_url VARCHAR(500),
     source_url VARCHAR(500) NOT NULL,
     documentation_url VARCHAR(500),
+    related_urls TEXT[] DEFAULT '{}',          -- Other URLs describing the same agent
     
     -- Contact Information
     contact_email VARCHAR(255),
@@ -206,6 +207,41 @@ CREATE INDEX IF NOT EXISTS idx_discovered_agents_confidence ON discovered_agents
 CREATE INDEX IF NOT EXISTS idx_discovered_agents_discovered_at ON discovered_agents(discovered_at DESC);
 CREATE INDEX IF NOT EXISTS idx_discovered_agents_tags ON discovered_agents USING GIN(tags);
 
+-- Migration: source_url became unique after agents were first stored. Keep
+-- one row per source_url (registered, then verified, then oldest), move
+-- outreach and verification history onto it, then drop the duplicates so the
+-- unique index can be created on existing tables. No-op on a clean table.
+DROP TABLE IF EXISTS pg_temp.discovered_agents_duplicates;
+CREATE TEMP TABLE discovered_agents_duplicates AS
+SELECT id, keep_id
+FROM (
+    SELECT
+        id,
+        FIRST_VALUE(id) OVER (
+            PARTITION BY source_url
+            ORDER BY registered DESC, verified DESC, created_at ASC, id ASC
+        ) AS keep_id
+    FROM discovered_agents
+) ranked
+WHERE id <> keep_id;
+
+UPDATE agent_outreach o SET agent_id = d.keep_id
+FROM discovered_agents_duplicates d WHERE o.agent_id = d.id;
+
+UPDATE agent_verification_queue q SET agent_id = d.keep_id
+FROM discovered_agents_duplicates d WHERE q.agent_id = d.id;
+
+DELETE FROM discovered_agents a
+USING discovered_agents_duplicates d WHERE a.id = d.id;
+
+DROP TABLE discovered_agents_duplicates;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_discovered_agents_source_url ON discovered_agents(source_url);
+
+-- Migration: related_urls was added to discovered_agents after the table was
+-- first created; CREATE TABLE IF NOT EXISTS leaves existing tables without it
+ALTER TABLE discovered_agents ADD COLUMN IF NOT EXISTS related_urls TEXT[] DEFAULT '{}';
+
 -- Outreach
 CREATE INDEX IF NOT EXISTS idx_agent_outreach_status ON agent_outreach(outreach_status);
 CREATE INDEX IF NOT EXISTS idx_agent_outreach_agent_id ON agent_outreach(agent_id);
@@ -0,0 +1,217 @@
+"""
+Scrape Cache - Compressed on-disk cache for Firecrawl scrape results
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from backend.tools.url_params import is_tracking_param
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so equivalent spellings share one cache entry
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters and trailing slashes, and sorts the query string.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+
+    port = parts.port
+    if port and not (scheme == "http" and port == 80) and not (scheme == "https" and port == 443):
+        host = f"{host}:{port}"
+
+    path = parts.path.rstrip("/") or "/"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(key, (parts.hostname or "").lower())
+    )
+
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+@dataclass
+class CacheEntry:
+    """A cached scrape result and its revalidation state"""
+    key: str
+    data: Dict
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class ScrapeCache:
+    """
+    SQLite-backed cache of scrape results.
+
+    Entries are zlib-compressed JSON keyed by canonical URL plus scrape
+    options. Fresh entries are served directly; expired entries keep the
+    origin's ETag/Last-Modified so the caller can revalidate with a cheap
+    conditional request before paying for a new scrape. When the total
+    stored size exceeds max_bytes, least recently used entries are evicted.
+
+    Methods are blocking; call them through asyncio.to_thread from async code.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024
+    ):
+        self.path = path or os.getenv("SCRAPE_CACHE_PATH", "scrape_cache.sqlite")
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._init_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits (or rolls back) and is closed on exit"""
+        with closing(sqlite3.connect(self.path)) as conn:
+            with conn:
+                yield conn
+
+    def _init_db(self):
+        """Create cache table if it doesn't exist"""
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_cache (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_scrape_cache_last_access "
+                "ON scrape_cache(last_access)"
+            )
+
+    def make_key(self, url: str, options: Dict) -> str:
+        """Cache key for a URL scraped with the given options"""
+        raw = canonicalize_url(url) + "\n" + json.dumps(options, sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, url: str, options: Dict) -> Optional[CacheEntry]:
+        """
+        Look up a cached scrape
+
+        Returns:
+            The entry, fresh or expired, or None if never cached
+        """
+        key = self.make_key(url, options)
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT body, etag, last_modified, expires_at FROM scrape_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE scrape_cache SET last_access = ? WHERE key = ?",
+                (time.time(), key)
+            )
+
+        body, etag, last_modified, expires_at = row
+
+        return CacheEntry(
+            key=key,
+            data=json.loads(zlib.decompress(body)),
+            etag=etag,
+            last_modified=last_modified,
+            expires_at=expires_at
+        )
+
+    def put(
+        self,
+        url: str,
+        options: Dict,
+        data: Dict,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
+        """
+        Store a scrape result
+
+        Args:
+            url: Scraped URL
+            options: Scrape options that shaped the result
+            data: Firecrawl response payload
+            etag: Origin ETag, for later revalidation
+            last_modified: Origin Last-Modified, for later revalidation
+        """
+        body = zlib.compress(json.dumps(data).encode(), 6)
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scrape_cache "
+                "(key, url, body, size, etag, last_modified, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.make_key(url, options),
+                    canonicalize_url(url),
+                    body,
+                    len(body),
+                    etag,
+                    last_modified,
+                    now + self.ttl_seconds,
+                    now
+                )
+            )
+            self._evict(conn)
+
+    def refresh(self, entry: CacheEntry):
+        """Extend an entry's TTL after the origin confirmed it unchanged"""
+        entry.expires_at = time.time() + self.ttl_seconds
+
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE scrape_cache SET expires_at = ?, last_access = ? WHERE key = ?",
+                (entry.expires_at, time.time(), entry.key)
+            )
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until under max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM scrape_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = conn.execute(
+            "SELECT key, size FROM scrape_cache ORDER BY last_access ASC"
+        ).fetchall()
+
+        evict = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evict.append((key,))
+            total -= size
+
+        conn.executemany("DELETE FROM scrape_cache WHERE key = ?", evict)
+
+    def clear(self):
+        """Delete every cached entry"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM scrape_cache")
@@ -75,10 +75,33 @@ cp "$DISCOVERY_PATH/backend/tools/grok_search.py" backend/tools/
 echo "  → backend/tools/firecrawl_scraper.py"
 cp "$DISCOVERY_PATH/backend/tools/firecrawl_scraper.py" backend/tools/
 
+echo "  → backend/tools/http_client.py"
+cp "$DISCOVERY_PATH/backend/tools/http_client.py" backend/tools/
+
+echo "  → backend/tools/adaptive_limiter.py"
+cp "$DISCOVERY_PATH/backend/tools/adaptive_limiter.py" backend/tools/
+
+echo "  → backend/tools/crawl_webhooks.py"
+cp "$DISCOVERY_PATH/backend/tools/crawl_webhooks.py" backend/tools/
+
+echo "  → backend/tools/scrape_cache.py"
+cp "$DISCOVERY_PATH/backend/tools/scrape_cache.py" backend/tools/
+echo "  → backend/tools/llm_json.py"
+cp "$DISCOVERY_PATH/backend/tools/llm_json.py" backend/tools/
+
+echo "  → backend/tools/benchmark_contacts.py"
+cp "$DISCOVERY_PATH/backend/tools/benchmark_contacts.py" backend/tools/
+
 # Agent
 echo "  → backend/agents/discovery_agent.py"
 cp "$DISCOVERY_PATH/backend/agents/discovery_agent.py" backend/agents/
 
+echo "  → backend/agents/discovery_checkpoint.py"
+cp "$DISCOVERY_PATH/backend/agents/discovery_checkpoint.py" backend/agents/
+
+echo "  → backend/agents/discovery_dedup.py"
+cp "$DISCOVERY_PATH/backend/agents/discovery_dedup.py" backend/agents/
+
 # Database
 echo "  → backend/database/discovery_schema.sql"
 mkdir -p backend/database
@@ -195,6 +218,13 @@ DISCOVERY_ENABLED=false
 GROK_API_KEY=your-grok-api-key-here          # Get from https://x.ai
 FIRECRAWL_API_KEY=your-firecrawl-key-here    # Get from https://firecrawl.dev
 
+# Optional: public URL of the crawl webhook receiver route
+# (CrawlWebhookReceiver.create_router); crawls fall back to polling without it
+FIRECRAWL_WEBHOOK_URL=
+
+# Local scrape cache (repeat scrapes served from disk, 7 day TTL)
+SCRAPE_CACHE_PATH=scrape_cache.sqlite
+
 # Discovery Settings
 DISCOVERY_MAX_RESULTS=50
 DISCOVERY_AUTO_VERIFY_THRESHOLD=0.9
@@ -213,7 +243,14 @@ echo ""
 echo "📝 Staging files for commit..."
 git add backend/tools/grok_search.py
 git add backend/tools/firecrawl_scraper.py
+git add backend/tools/http_client.py
+git add backend/tools/adaptive_limiter.py
+git add backend/tools/crawl_webhooks.py
+git add backend/tools/scrape_cache.py
+git add backend/tools/llm_json.py
 git add backend/agents/discovery_agent.py
+git add backend/agents/discovery_checkpoint.py
+git add backend/agents/discovery_dedup.py
 git add backend/database/discovery_schema.sql
 git add backend/config/discovery_config.py
 git add requirements.txt 2>/dev/null || true
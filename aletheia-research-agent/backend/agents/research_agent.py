@@ -1,145 +1,305 @@
 """LangGraph agent orchestration for research workflows."""
-from typing import TypedDict, List, Dict, Annotated
+from dataclasses import dataclass, replace
+from typing import TypedDict, List, Dict, Annotated, Optional, Tuple
+import asyncio
+import json
 import operator
-from langgraph.graph import StateGraph, END
-from tools.web_search import perform_search, cross_verify_sources
-from llm.minimax_client import get_minimax_client
+import re
+import threading
+import time
+from config import settings
+from tools.web_search import perform_multi_search, cross_verify_sources
+from tools.passage_ranker import select_passages
+from llm.response_cache import ResponseCache, hashing_embedding
+from llm.gateway import get_llm_gateway, Priority
+from tracing import collect_spans, span
+
+
+@dataclass(slots=True)
+class ThinkingStep:
+    """One entry of the thinking trace; numbered when the trace is returned."""
+    action: str
+    description: str
+    confidence: float
+    duration_ms: Optional[int] = None
+    
+    def to_dict(self, step: int) -> Dict:
+        step_dict = {
+            "step": step,
+            "action": self.action,
+            "description": self.description,
+            "confidence": self.confidence
+        }
+        if self.duration_ms is not None:
+            step_dict["duration_ms"] = self.duration_ms
+        return step_dict
+
+
+@dataclass(slots=True)
+class Source:
+    """A search result carried through verification and synthesis."""
+    title: str
+    url: str
+    content: str
+    score: float = 0.0
+    queries: Tuple[str, ...] = ()
+    excerpt: str = ""
+    
+    @classmethod
+    def from_result(cls, result: Dict) -> "Source":
+        return cls(
+            title=result["title"],
+            url=result["url"],
+            content=result.get("content", ""),
+            score=result.get("score", 0.0),
+            queries=tuple(result.get("queries", ())),
+            excerpt=result.get("excerpt", "")
+        )
+    
+    def to_dict(self) -> Dict:
+        source = {
+            "title": self.title,
+            "url": self.url,
+            "content": self.content,
+            "score": self.score
+        }
+        if self.queries:
+            source["queries"] = list(self.queries)
+        if self.excerpt:
+            source["excerpt"] = self.excerpt
+        return source
 
 
 class AgentState(TypedDict):
-    """State for the research agent."""
+    """
+    State for the research agent.
+    
+    Nodes return only the keys they change. thinking_steps is append-only
+    (each node returns its new steps); every other key is replaced.
+    """
     messages: Annotated[List[Dict], operator.add]
     query: str
-    search_results: List[Dict]
-    verified_sources: List[Dict]
-    thinking_steps: List[Dict]
+    sub_queries: List[str]
+    verified_sources: List[Source]
+    thinking_steps: Annotated[List[ThinkingStep], operator.add]
     final_response: str
     error: str
 
 
+# Turns the model can answer without the web: small talk and plain arithmetic
+_NO_SEARCH_PATTERNS = [
+    re.compile(r"^(hi|hello|hey|good (morning|afternoon|evening))( there)?[\s!.,]*$"),
+    re.compile(r"^(thanks|thank you|thx|ok|okay|great|cool|got it|bye|goodbye)( (so much|a lot|again))?[\s!.,]*$"),
+    re.compile(r"^(who|what) are you\??$"),
+    re.compile(r"^((what is|what's|calculate) )?[\d.]+( ?[-+*/^%x] ?[\d.]+)+ ?=? ?\??$"),
+]
+
+
+def _needs_search(query: str) -> bool:
+    """False for queries that obviously don't need web research."""
+    normalized = " ".join(query.lower().split())
+    return not any(pattern.match(normalized) for pattern in _NO_SEARCH_PATTERNS)
+
+
 class ResearchAgent:
     """LangGraph-based research agent with multi-step workflow."""
     
     def __init__(self):
-        """Initialize research agent."""
-        self.llm_client = None
+        """
+        Initialize research agent.
+        
+        LLM availability is resolved and the graph compiled here, once;
+        after construction the agent holds no per-run state, so one instance
+        can serve any number of concurrent runs.
+        """
+        self.llm_available = self._llm_available()
+        self.result_cache = ResponseCache(
+            ttl_seconds=settings.research_cache_ttl_seconds,
+            max_entries=settings.research_cache_max_entries,
+            semantic_enabled=settings.llm_semantic_cache_enabled,
+            semantic_threshold=settings.llm_semantic_cache_threshold
+        ) if settings.research_cache_enabled else None
         self.graph = self._build_graph()
     
-    def _get_client(self):
-        """Lazy load LLM client."""
-        if self.llm_client is None:
-            try:
-                self.llm_client = get_minimax_client()
-            except ValueError as e:
-                # LLM client unavailable
-                self.llm_client = None
-        return self.llm_client
+    @staticmethod
+    def _llm_available() -> bool:
+        """Whether the gateway has an endpoint to call (LLM_ENDPOINTS or MINIMAX_*)."""
+        try:
+            get_llm_gateway().client
+        except ValueError:
+            return False
+        return True
+    
+    async def _decompose(self, query: str) -> List[str]:
+        """
+        Split a complex question into focused search queries.
+        
+        Short questions are searched as-is; the extra LLM round trip only
+        pays off when one query can't cover the question. The original
+        query is always searched too.
+        """
+        max_sub_queries = settings.research_max_sub_queries
+        if max_sub_queries <= 0 or len(query.split()) < settings.research_decompose_min_words:
+            return [query]
+        
+        if not self.llm_available:
+            return [query]
+        
+        prompt = (
+            f"Break this research question into at most {max_sub_queries} focused web "
+            "search queries that together cover it. Respond with a JSON array of "
+            f"strings only.\n\nQuestion: {query}"
+        )
+        
+        try:
+            response = await get_llm_gateway().generate_response(
+                [{"role": "user", "content": prompt}],
+                priority=Priority.INTERACTIVE,
+                temperature=0.2,
+                max_tokens=300
+            )
+            content = response["content"]
+            sub_queries = json.loads(content[content.index("["):content.rindex("]") + 1])
+        except Exception as e:
+            print(f"Query decomposition failed: {e}")
+            return [query]
+        
+        queries = [query]
+        for sub_query in sub_queries:
+            if isinstance(sub_query, str) and sub_query.strip() and sub_query.strip() not in queries:
+                queries.append(sub_query.strip())
+        
+        return queries[:max_sub_queries + 1]
+    
+    def _cache_args(self, query: str) -> Dict:
+        """Result cache lookup arguments; finished research is keyed by the question."""
+        return {
+            "model": f"research:{settings.minimax_model}",
+            "system_prompt": "",
+            "messages": [{"role": "user", "content": query}],
+            "temperature": 0.0
+        }
     
-    async def reflect(self, state: AgentState) -> AgentState:
+    def _cached_result(self, query: str) -> Optional[Dict]:
+        if self.result_cache is None:
+            return None
+        return self.result_cache.get(**self._cache_args(query))
+    
+    async def reflect(self, state: AgentState) -> Dict:
         """Reflect on the query and plan research approach."""
-        thinking_steps = state.get("thinking_steps", [])
-        thinking_steps.append({
-            "step": len(thinking_steps) + 1,
-            "action": "reflect",
-            "description": f"Analyzing query: {state['query']}",
-            "confidence": 0.9
-        })
+        cached = self._cached_result(state["query"])
+        if cached is not None:
+            # Short-circuit: the graph ends here when final_response is set
+            kind = "identical" if cached["cache_hit"] == "exact" else "similar"
+            return {
+                "verified_sources": cached["verified_sources"],
+                "final_response": cached["final_response"],
+                "thinking_steps": [
+                    ThinkingStep("reflect", f"Reusing research from a recent {kind} question", 0.9),
+                    *cached["thinking_steps"]
+                ]
+            }
+        
+        if settings.research_fast_path_enabled and not _needs_search(state["query"]):
+            # Fast path: no sub-queries routes straight to synthesize
+            return {
+                "sub_queries": [],
+                "thinking_steps": [
+                    ThinkingStep("reflect", "Answering directly (no research needed)", 0.9)
+                ]
+            }
+        
+        sub_queries = await self._decompose(state["query"])
+        
+        description = f"Analyzing query: {state['query']}"
+        if len(sub_queries) > 1:
+            description += f" ({len(sub_queries)} search angles)"
         
         return {
-            **state,
-            "thinking_steps": thinking_steps
+            "sub_queries": sub_queries,
+            "thinking_steps": [ThinkingStep("reflect", description, 0.9)]
         }
     
-    async def search(self, state: AgentState) -> AgentState:
+    async def search(self, state: AgentState) -> Dict:
         """Perform web search."""
-        query = state["query"]
+        queries = state.get("sub_queries") or [state["query"]]
+        
+        # Search every angle concurrently and fuse the results
+        results = await perform_multi_search(queries, max_results_per_query=5, max_results=8)
         
-        # Perform search
-        results = await perform_search(query, max_results=5)
+        # The "search unavailable" stand-in isn't a source worth citing
+        sources = [Source.from_result(r) for r in results if not r.get("placeholder")]
         
-        thinking_steps = state.get("thinking_steps", [])
-        thinking_steps.append({
-            "step": len(thinking_steps) + 1,
-            "action": "search",
-            "description": f"Found {len(results)} sources",
-            "confidence": 0.85
-        })
+        if not sources:
+            step = ThinkingStep("search", "Search unavailable; answering without sources", 0.3)
+        elif len(sources) < 2:
+            step = ThinkingStep(
+                "search",
+                f"Found {len(sources)} source across {len(queries)} queries (too few to cross-verify)",
+                0.85
+            )
+        else:
+            step = ThinkingStep("search", f"Found {len(sources)} sources across {len(queries)} queries", 0.85)
         
+        # verify only runs with two or more sources and narrows this list
         return {
-            **state,
-            "search_results": results,
-            "thinking_steps": thinking_steps
+            "verified_sources": sources,
+            "thinking_steps": [step]
         }
     
-    async def verify(self, state: AgentState) -> AgentState:
+    async def verify(self, state: AgentState) -> Dict:
         """Verify and cross-check sources."""
-        results = state.get("search_results", [])
-        
-        if len(results) < 2:
-            thinking_steps = state.get("thinking_steps", [])
-            thinking_steps.append({
-                "step": len(thinking_steps) + 1,
-                "action": "verify",
-                "description": "Insufficient sources for cross-verification",
-                "confidence": 0.5
-            })
-            return {
-                **state,
-                "verified_sources": results,
-                "thinking_steps": thinking_steps
-            }
+        sources = state["verified_sources"]
         
-        # Extract URLs for verification
-        urls = [r["url"] for r in results[:3]]
-        verified = await cross_verify_sources(urls)
+        # Check every fused source concurrently; passage reranking in
+        # synthesize decides which of them are worth the context budget
+        verified = await cross_verify_sources([source.url for source in sources])
+        accessible_urls = {v["url"] for v in verified if v.get("accessible", False)}
         
-        # Filter accessible sources
-        accessible_sources = [
-            results[i] for i, v in enumerate(verified)
-            if v.get("accessible", False)
-        ]
+        # Filter accessible sources, keeping the search ranking
+        accessible_sources = [source for source in sources if source.url in accessible_urls]
         
-        thinking_steps = state.get("thinking_steps", [])
-        thinking_steps.append({
-            "step": len(thinking_steps) + 1,
-            "action": "verify",
-            "description": f"Verified {len(accessible_sources)}/{len(results)} sources",
-            "confidence": 0.8
-        })
+        step = ThinkingStep("verify", f"Verified {len(accessible_sources)}/{len(sources)} sources", 0.8)
+        
+        if not accessible_sources:
+            return {"thinking_steps": [step]}
         
         return {
-            **state,
-            "verified_sources": accessible_sources if accessible_sources else results,
-            "thinking_steps": thinking_steps
+            "verified_sources": accessible_sources,
+            "thinking_steps": [step]
         }
     
-    async def synthesize(self, state: AgentState) -> AgentState:
+    async def synthesize(self, state: AgentState) -> Dict:
         """Synthesize findings using LLM."""
-        client = self._get_client()
+        sources = state.get("verified_sources", [])
         
-        if client is None:
+        if not self.llm_available:
             # Fallback without LLM
-            sources = state.get("verified_sources", [])
-            response = self._create_fallback_response(state["query"], sources)
-            
-            thinking_steps = state.get("thinking_steps", [])
-            thinking_steps.append({
-                "step": len(thinking_steps) + 1,
-                "action": "synthesize",
-                "description": "Generated response from search results (LLM unavailable)",
-                "confidence": 0.6
-            })
-            
             return {
-                **state,
-                "final_response": response,
-                "thinking_steps": thinking_steps
+                "final_response": self._create_fallback_response(state["query"], sources),
+                "thinking_steps": [
+                    ThinkingStep("synthesize", "Generated response from search results (LLM unavailable)", 0.6)
+                ]
             }
         
+        if not sources:
+            return await self._answer_directly(state)
+        
+        # Keep only the most relevant, non-redundant passages. Citation
+        # numbers refer to this list, so it replaces verified_sources.
+        ranking_query = " ".join([state["query"], *state.get("sub_queries", [])[1:]])
+        passages = select_passages(
+            ranking_query,
+            [source.content for source in sources],
+            token_budget=settings.research_context_token_budget,
+            embedder=hashing_embedding if settings.research_rerank_embeddings else None
+        )
+        if passages:
+            sources = [replace(sources[index], excerpt=excerpt) for index, excerpt in passages]
+        
         # Build prompt with search results
-        sources = state.get("verified_sources", [])
         sources_text = "\n\n".join([
-            f"[{i+1}] {s['title']}\nURL: {s['url']}\n{s['content']}"
+            f"[{i+1}] {s.title}\nURL: {s.url}\n{s.excerpt or s.content}"
             for i, s in enumerate(sources)
         ])
         
@@ -151,31 +311,47 @@ class ResearchAgent:
         ]
         
         try:
-            response = await client.generate_response(messages)
-            
-            thinking_steps = state.get("thinking_steps", [])
-            thinking_steps.append({
-                "step": len(thinking_steps) + 1,
-                "action": "synthesize",
-                "description": "Generated comprehensive response",
-                "confidence": 0.95
-            })
-            
+            response = await get_llm_gateway().generate_response(
+                messages,
+                priority=Priority.INTERACTIVE
+            )
+        except Exception as e:
+            # Fallback on error
             return {
-                **state,
-                "final_response": response["content"],
-                "thinking_steps": thinking_steps
+                "verified_sources": sources,
+                "final_response": self._create_fallback_response(state["query"], sources),
+                "error": str(e)
             }
+        
+        return {
+            "verified_sources": sources,
+            "final_response": response["content"],
+            "thinking_steps": [
+                ThinkingStep("synthesize", "Generated comprehensive response", 0.95)
+            ]
+        }
+    
+    async def _answer_directly(self, state: AgentState) -> Dict:
+        """Answer from the model alone (fast path, or search found nothing usable)."""
+        messages = [*state.get("messages", []), {"role": "user", "content": state["query"]}]
+        
+        try:
+            response = await get_llm_gateway().generate_response(
+                messages,
+                priority=Priority.INTERACTIVE
+            )
         except Exception as e:
-            # Fallback on error
-            response = self._create_fallback_response(state["query"], sources)
             return {
-                **state,
-                "final_response": response,
+                "final_response": self._create_fallback_response(state["query"], []),
                 "error": str(e)
             }
+        
+        return {
+            "final_response": response["content"],
+            "thinking_steps": [ThinkingStep("synthesize", "Generated response without web sources", 0.7)]
+        }
     
-    def _create_fallback_response(self, query: str, sources: List[Dict]) -> str:
+    def _create_fallback_response(self, query: str, sources: List[Source]) -> str:
         """Create fallback response without LLM."""
         if not sources:
             return f"I found no reliable sources for: {query}. Please try a different query or check your internet connection."
@@ -183,85 +359,269 @@ class ResearchAgent:
         response = f"Research findings for: {query}\n\n"
         
         for i, source in enumerate(sources[:3], 1):
-            response += f"[{i}] {source['title']}\n"
-            response += f"{source['content'][:200]}...\n"
-            response += f"Source: {source['url']}\n\n"
+            response += f"[{i}] {source.title}\n"
+            response += f"{source.content[:200]}...\n"
+            response += f"Source: {source.url}\n\n"
         
         response += "Note: Full synthesis unavailable. Please configure MINIMAX_API_KEY for enhanced responses."
         
         return response
     
-    async def suggest(self, state: AgentState) -> AgentState:
-        """Generate follow-up suggestions."""
-        query = state["query"]
-        
-        # Simple follow-up generation
-        suggestions = [
-            f"What are the latest developments in {query}?",
-            f"How does {query} compare to alternatives?",
-            f"What are the practical applications of {query}?"
-        ]
-        
-        thinking_steps = state.get("thinking_steps", [])
-        thinking_steps.append({
-            "step": len(thinking_steps) + 1,
-            "action": "suggest",
-            "description": "Generated follow-up suggestions",
-            "confidence": 0.8
-        })
-        
-        return {
-            **state,
-            "thinking_steps": thinking_steps
-        }
-    
-    def _build_graph(self) -> StateGraph:
+    def _build_graph(self):
         """Build LangGraph workflow."""
+        # Imported here so importing this module doesn't pull in langgraph
+        from langgraph.graph import StateGraph, END
+        
         workflow = StateGraph(AgentState)
         
         # Add nodes
-        workflow.add_node("reflect", self.reflect)
-        workflow.add_node("search", self.search)
-        workflow.add_node("verify", self.verify)
-        workflow.add_node("synthesize", self.synthesize)
-        workflow.add_node("suggest", self.suggest)
+        workflow.add_node("reflect", self._traced("reflect", self.reflect))
+        workflow.add_node("search", self._traced("search", self.search))
+        workflow.add_node("verify", self._traced("verify", self.verify))
+        workflow.add_node("synthesize", self._traced("synthesize", self.synthesize))
         
-        # Define edges
+        # Define edges; the common path skips whatever it doesn't need
         workflow.set_entry_point("reflect")
-        workflow.add_edge("reflect", "search")
-        workflow.add_edge("search", "verify")
+        workflow.add_conditional_edges(
+            "reflect",
+            self._route_after_reflect,
+            {"done": END, "direct": "synthesize", "search": "search"}
+        )
+        workflow.add_conditional_edges(
+            "search",
+            self._route_after_search,
+            {"verify": "verify", "synthesize": "synthesize"}
+        )
         workflow.add_edge("verify", "synthesize")
-        workflow.add_edge("synthesize", "suggest")
-        workflow.add_edge("suggest", END)
+        workflow.add_edge("synthesize", END)
         
         return workflow.compile()
     
+    @staticmethod
+    def _traced(name: str, node):
+        """Run a node in a span and stamp the thinking steps it adds with its duration."""
+        async def run(state: AgentState) -> Dict:
+            with span(f"agent.{name}") as record:
+                update = await node(state)
+            
+            # Steps replayed from the result cache keep their own durations
+            for step in update.get("thinking_steps", []):
+                if step.duration_ms is None:
+                    step.duration_ms = record.duration_ms
+            return update
+        
+        return run
+    
+    @staticmethod
+    def _route_after_reflect(state: AgentState) -> str:
+        if state.get("final_response"):
+            return "done"
+        if not state.get("sub_queries"):
+            return "direct"
+        return "search"
+    
+    @staticmethod
+    def _route_after_search(state: AgentState) -> str:
+        # Cross-verification needs at least two sources to compare
+        return "verify" if len(state.get("verified_sources", [])) >= 2 else "synthesize"
+    
     async def run(self, query: str, messages: List[Dict] = None) -> Dict:
-        """Run the research agent workflow."""
+        """
+        Run the research agent workflow.
+        
+        Returns:
+            Dict with response, sources, thinking_trace, error and
+            search_queries (one row per Tavily call, for the search_queries
+            table)
+        """
         initial_state = {
             "messages": messages or [],
             "query": query,
-            "search_results": [],
+            "sub_queries": [],
             "verified_sources": [],
             "thinking_steps": [],
             "final_response": "",
             "error": ""
         }
         
-        final_state = await self.graph.ainvoke(initial_state)
+        with collect_spans() as spans:
+            final_state = await self.graph.ainvoke(initial_state)
+        
+        # Only fully researched answers are reused: a cache hit or the fast
+        # path leaves sub_queries empty, a failed synthesis sets error
+        if (
+            self.result_cache is not None
+            and self.llm_available
+            and final_state["sub_queries"]
+            and final_state["verified_sources"]
+            and not final_state["error"]
+        ):
+            self.result_cache.put(**self._cache_args(query), response={
+                "final_response": final_state["final_response"],
+                "verified_sources": final_state["verified_sources"],
+                "thinking_steps": final_state["thinking_steps"]
+            })
         
         return {
             "response": final_state["final_response"],
-            "sources": final_state.get("verified_sources", []),
-            "thinking_trace": final_state.get("thinking_steps", []),
-            "error": final_state.get("error", "")
+            "sources": [source.to_dict() for source in final_state["verified_sources"]],
+            "thinking_trace": [
+                step.to_dict(number)
+                for number, step in enumerate(final_state["thinking_steps"], 1)
+            ],
+            "error": final_state["error"],
+            "search_queries": [
+                {
+                    "query": record.attributes["query"],
+                    "results_count": record.attributes.get("results_count", 0),
+                    "execution_time": record.duration_ms
+                }
+                for record in spans
+                if record.name == "tavily.search"
+            ]
         }
 
 
-# Global agent instance
-research_agent = ResearchAgent()
+class AgentBusyError(Exception):
+    """No research run slot freed up within the queue timeout."""
+
+
+class ResearchRuntime:
+    """
+    Owns the shared research agent and bounds concurrent runs.
+    
+    The agent (compiled graph plus LLM client) is built once, either by
+    `warm_up` at startup or by the first run, under a lock so concurrent
+    first requests don't compile it twice. At most `max_concurrent_runs`
+    runs execute at once; the rest queue for up to `queue_timeout` seconds
+    and then fail with AgentBusyError instead of piling up behind the LLM
+    and search rate limits.
+    """
+    
+    def __init__(self, max_concurrent_runs: int = 8, queue_timeout: float = 30.0):
+        """
+        Initialize research runtime.
+        
+        Args:
+            max_concurrent_runs: Runs allowed to execute at once
+            queue_timeout: Seconds a run may wait for a slot
+        """
+        self.max_concurrent_runs = max_concurrent_runs
+        self.queue_timeout = queue_timeout
+        self._agent: Optional[ResearchAgent] = None
+        self._agent_lock = threading.Lock()
+        self._slots = asyncio.Semaphore(max_concurrent_runs)
+        
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    @property
+    def agent(self) -> ResearchAgent:
+        """The shared agent, built on first access."""
+        if self._agent is None:
+            with self._agent_lock:
+                if self._agent is None:
+                    self._agent = ResearchAgent()
+        return self._agent
+    
+    async def warm_up(self):
+        """
+        Build the agent and LLM clients before the first request.
+        
+        Importing langgraph and compiling the graph is blocking work, so it
+        runs in a thread; HTTP clients are then created on the event loop.
+        """
+        started = time.perf_counter()
+        await asyncio.to_thread(lambda: self.agent)
+        
+        try:
+            router = get_llm_gateway().client
+            for endpoint in getattr(router, "endpoints", []):
+                getattr(endpoint.client, "async_client", None)
+        except ValueError as e:
+            print(f"Research runtime warm-up without LLM: {e}")
+        
+        print(f"Research runtime warmed up in {time.perf_counter() - started:.2f}s")
+    
+    async def run(self, query: str, messages: List[Dict] = None) -> Dict:
+        """
+        Run the research agent once a slot is free.
+        
+        Raises:
+            AgentBusyError: No slot freed up within the queue timeout
+        """
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise AgentBusyError(f"No research slot free after {self.queue_timeout:.0f}s")
+        finally:
+            self.waiting -= 1
+        
+        wait = time.monotonic() - queued_at
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        
+        self.running += 1
+        try:
+            result = await self.agent.run(query, messages)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self._slots.release()
+        
+        self.completed += 1
+        return result
+    
+    def stats(self) -> Dict:
+        """Concurrency and queueing counters, plus result cache stats once the agent exists."""
+        admitted = self.completed + self.failed + self.running
+        agent = self._agent
+        return {
+            "max_concurrent_runs": self.max_concurrent_runs,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": self.total_wait / admitted if admitted else 0.0,
+            "max_wait_seconds": self.max_wait,
+            "result_cache": (
+                agent.result_cache.stats()
+                if agent is not None and agent.result_cache is not None
+                else None
+            )
+        }
+
+
+# Global runtime instance
+research_runtime = None
+
+def get_research_runtime() -> ResearchRuntime:
+    """Get or create the research runtime."""
+    global research_runtime
+    if research_runtime is None:
+        research_runtime = ResearchRuntime(
+            max_concurrent_runs=settings.research_max_concurrent_runs,
+            queue_timeout=settings.research_queue_timeout_seconds
+        )
+    return research_runtime
+
+
+def get_research_agent() -> ResearchAgent:
+    """Get the shared research agent (compiles the graph on first use)."""
+    return get_research_runtime().agent
 
 
 async def run_research_agent(query: str, messages: List[Dict] = None) -> Dict:
     """Run research agent on query."""
-    return await research_agent.run(query, messages)
+    return await get_research_runtime().run(query, messages)
@@ -1,8 +1,9 @@
 """Authentication routes."""
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
-from supabase import create_client
 from config import settings
+from database import get_supabase
+from tracing import span
 from auth.jwt_handler import create_access_token, create_refresh_token, verify_token
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -10,9 +11,6 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 security = HTTPBearer()
 
-# Supabase client
-supabase = create_client(settings.supabase_url, settings.supabase_service_role_key)
-
 
 class SignUpRequest(BaseModel):
     """Sign up request model."""
@@ -38,10 +36,11 @@ async def signup(request: SignUpRequest):
     """Sign up a new user."""
     try:
         # Create user in Supabase Auth
-        auth_response = supabase.auth.sign_up({
-            "email": request.email,
-            "password": request.password
-        })
+        with span("supabase.auth.sign_up"):
+            auth_response = get_supabase().auth.sign_up({
+                "email": request.email,
+                "password": request.password
+            })
         
         if not auth_response.user:
             raise HTTPException(status_code=400, detail="Failed to create user")
@@ -49,10 +48,11 @@ async def signup(request: SignUpRequest):
         user = auth_response.user
         
         # Create user profile
-        supabase.table("users").insert({
-            "id": user.id,
-            "email": user.email
-        }).execute()
+        with span("supabase.users.insert"):
+            get_supabase().table("users").insert({
+                "id": user.id,
+                "email": user.email
+            }).execute()
         
         # Generate JWT tokens
         access_token = create_access_token({"sub": user.id, "email": user.email})
@@ -73,10 +73,11 @@ async def signin(request: SignInRequest):
     """Sign in an existing user."""
     try:
         # Sign in with Supabase Auth
-        auth_response = supabase.auth.sign_in_with_password({
-            "email": request.email,
-            "password": request.password
-        })
+        with span("supabase.auth.sign_in"):
+            auth_response = get_supabase().auth.sign_in_with_password({
+                "email": request.email,
+                "password": request.password
+            })
         
         if not auth_response.user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -139,11 +140,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     user_id = payload.get("sub")
     
     # Get user profile
-    result = supabase.table("users")\
-        .select("*")\
-        .eq("id", user_id)\
-        .maybeSingle()\
-        .execute()
+    with span("supabase.users.select"):
+        result = get_supabase().table("users")\
+            .select("*")\
+            .eq("id", user_id)\
+            .maybeSingle()\
+            .execute()
     
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
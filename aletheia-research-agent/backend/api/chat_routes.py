@@ -1,23 +1,21 @@
 """API routes for chat functionality."""
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, UploadFile, File
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from auth.jwt_handler import get_current_user_id
-from agents.research_agent import run_research_agent
+from agents.research_agent import run_research_agent, AgentBusyError
 from tools.data_processor import process_file
-from llm.minimax_client import get_minimax_client
+from llm.gateway import get_llm_gateway, LLMUnavailableError, Priority
 from middleware.error_handler import sanitize_input, validate_input_length
-from supabase import create_client
-from config import settings
-import json
+from api.sse import StreamTranscript, coalesced_sse, sse_frame
+from api.stream_replay import get_resumable_streams
+from database import get_supabase, get_message_writer, get_search_query_writer
+from tracing import span
 
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
-# Supabase client
-supabase = create_client(settings.supabase_url, settings.supabase_service_role_key)
-
 
 class ChatRequest(BaseModel):
     """Chat request model."""
@@ -49,25 +47,28 @@ async def send_message(
         conv_id = request.conversation_id
     else:
         # Create new conversation
-        result = supabase.table("conversations").insert({
-            "user_id": user_id,
-            "title": message[:50]  # First 50 chars as title
-        }).execute()
+        with span("supabase.conversations.insert"):
+            result = get_supabase().table("conversations").insert({
+                "user_id": user_id,
+                "title": message[:50]  # First 50 chars as title
+            }).execute()
         conv_id = result.data[0]["id"]
 
     # Save user message
-    user_msg = supabase.table("messages").insert({
-        "conversation_id": conv_id,
-        "role": "user",
-        "content": message
-    }).execute()
+    with span("supabase.messages.insert"):
+        user_msg = get_supabase().table("messages").insert({
+            "conversation_id": conv_id,
+            "role": "user",
+            "content": message
+        }).execute()
 
     # Get conversation history
-    history_result = supabase.table("messages")\
-        .select("role, content")\
-        .eq("conversation_id", conv_id)\
-        .order("timestamp", desc=False)\
-        .execute()
+    with span("supabase.messages.select"):
+        history_result = get_supabase().table("messages")\
+            .select("role, content")\
+            .eq("conversation_id", conv_id)\
+            .order("timestamp", desc=False)\
+            .execute()
 
     messages = [
         {"role": msg["role"], "content": msg["content"]}
@@ -75,21 +76,29 @@ async def send_message(
     ]
 
     # Run agent if search is enabled
+    search_queries = []
     if request.enable_search:
         try:
             agent_result = await run_research_agent(message, messages)
             response_text = agent_result["response"]
             sources = agent_result.get("sources", [])
             thinking_trace = agent_result.get("thinking_trace", [])
+            search_queries = agent_result.get("search_queries", [])
+        except AgentBusyError:
+            response_text = "I'm handling a lot of requests right now. Please try again in a moment."
+            sources = []
+            thinking_trace = []
         except Exception as e:
             # Fallback to LLM
             request.enable_search = False
     else:
         # Use LLM directly without search
         try:
-            client = get_minimax_client()
             messages.append({"role": "user", "content": message})
-            llm_response = await client.generate_response(messages)
+            llm_response = await get_llm_gateway().generate_response(
+                messages,
+                priority=Priority.INTERACTIVE
+            )
             response_text = llm_response["content"]
             sources = []
             thinking_trace = llm_response.get("thinking_trace", [])
@@ -97,26 +106,37 @@ async def send_message(
             response_text = "I'm currently unavailable. Please configure the required API keys (MINIMAX_API_KEY, TAVILY_API_KEY) to enable full functionality."
             sources = []
             thinking_trace = []
+        except LLMUnavailableError:
+            response_text = "I'm handling a lot of requests right now. Please try again in a moment."
+            sources = []
+            thinking_trace = []
     
     # Save assistant message
-    assistant_msg = supabase.table("messages").insert({
-        "conversation_id": conv_id,
-        "role": "assistant",
-        "content": response_text,
-        "thinking_trace": thinking_trace,
-        "sources": sources
-    }).execute()
+    with span("supabase.messages.insert"):
+        assistant_msg = get_supabase().table("messages").insert({
+            "conversation_id": conv_id,
+            "role": "assistant",
+            "content": response_text,
+            "thinking_trace": thinking_trace,
+            "sources": sources
+        }).execute()
     
     # Save sources
     if sources:
         for source in sources:
-            supabase.table("sources").insert({
-                "message_id": assistant_msg.data[0]["id"],
-                "url": source.get("url"),
-                "title": source.get("title"),
-                "content": source.get("content", "")[:500],
-                "credibility_score": source.get("score", 0.0)
-            }).execute()
+            with span("supabase.sources.insert"):
+                get_supabase().table("sources").insert({
+                    "message_id": assistant_msg.data[0]["id"],
+                    "url": source.get("url"),
+                    "title": source.get("title"),
+                    "content": source.get("content", "")[:500],
+                    "credibility_score": source.get("score", 0.0)
+                }).execute()
+    
+    # Search timings are analytics only; keep them off the response path
+    query_writer = get_search_query_writer()
+    for search_query in search_queries:
+        query_writer.submit({"message_id": assistant_msg.data[0]["id"], **search_query})
     
     return ChatResponse(
         message_id=assistant_msg.data[0]["id"],
@@ -129,6 +149,7 @@ async def send_message(
 @router.post("/stream")
 async def stream_message(
     request: ChatRequest,
+    http_request: Request,
     user_id: str = Depends(get_current_user_id)
 ):
     """Stream a chat response."""
@@ -139,61 +160,110 @@ async def stream_message(
     if request.conversation_id:
         conv_id = request.conversation_id
     else:
-        result = supabase.table("conversations").insert({
-            "user_id": user_id,
-            "title": message[:50]
-        }).execute()
+        with span("supabase.conversations.insert"):
+            result = get_supabase().table("conversations").insert({
+                "user_id": user_id,
+                "title": message[:50]
+            }).execute()
         conv_id = result.data[0]["id"]
     
-    # Save user message
-    supabase.table("messages").insert({
-        "conversation_id": conv_id,
-        "role": "user",
-        "content": message
-    }).execute()
-    
-    # Get conversation history
-    history_result = supabase.table("messages")\
-        .select("role, content")\
-        .eq("conversation_id", conv_id)\
-        .order("timestamp", desc=False)\
-        .execute()
+    # Get conversation history (before this message is queued for saving)
+    with span("supabase.messages.select"):
+        history_result = get_supabase().table("messages")\
+            .select("role, content")\
+            .eq("conversation_id", conv_id)\
+            .order("timestamp", desc=False)\
+            .execute()
     
     messages = [
         {"role": msg["role"], "content": msg["content"]}
-        for msg in history_result.data[:-1]
+        for msg in history_result.data
     ]
     messages.append({"role": "user", "content": message})
     
-    async def generate():
-        """Generate streaming response."""
+    # Messages are persisted write-behind so DB latency stays off the stream
+    writer = get_message_writer()
+    writer.submit({
+        "conversation_id": conv_id,
+        "role": "user",
+        "content": message
+    })
+    
+    async def save_response(transcript: StreamTranscript) -> Dict:
+        """Queue assistant message once the model has finished."""
+        message_id = writer.submit({
+            "conversation_id": conv_id,
+            "role": "assistant",
+            "content": transcript.text,
+            "thinking_trace": transcript.thinking
+        })
+        return {"message_id": message_id, "conversation_id": conv_id}
+    
+    async def save_partial_response(transcript: StreamTranscript):
+        """Keep whatever was generated before the stream was cut off."""
+        if not transcript.text_parts:
+            return
+        writer.submit({
+            "conversation_id": conv_id,
+            "role": "assistant",
+            "content": transcript.text,
+            "thinking_trace": transcript.thinking,
+            "metadata": {"partial": True}
+        })
+    
+    async def generate(abandoned):
+        """Generate streaming response (runs independently of the connection)."""
         try:
-            client = get_minimax_client()
-            full_response = ""
-            thinking_traces = []
+            chunks = get_llm_gateway().generate_streaming_response(
+                messages,
+                priority=Priority.INTERACTIVE
+            )
             
-            async for chunk in client.generate_streaming_response(messages):
-                if chunk["type"] == "text_delta":
-                    full_response += chunk["text"]
-                    yield f"data: {json.dumps({'type': 'text', 'content': chunk['text']})}\n\n"
-                elif chunk["type"] == "thinking_delta":
-                    thinking_traces.append(chunk["thinking"])
-                    yield f"data: {json.dumps({'type': 'thinking', 'content': chunk['thinking']})}\n\n"
-                elif chunk["type"] == "done":
-                    # Save assistant message
-                    supabase.table("messages").insert({
-                        "conversation_id": conv_id,
-                        "role": "assistant",
-                        "content": full_response,
-                        "thinking_trace": thinking_traces
-                    }).execute()
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+            async for frame in coalesced_sse(
+                chunks,
+                is_disconnected=abandoned,
+                transcript=StreamTranscript(),
+                on_done=save_response,
+                on_abort=save_partial_response
+            ):
+                yield frame
+        
+        except LLMUnavailableError:
+            error_msg = "I'm handling a lot of requests right now. Please try again in a moment."
+            yield sse_frame({'type': 'error', 'content': error_msg})
         
         except Exception as e:
             error_msg = "Streaming unavailable. Please configure MINIMAX_API_KEY."
-            yield f"data: {json.dumps({'type': 'error', 'content': error_msg})}\n\n"
+            yield sse_frame({'type': 'error', 'content': error_msg})
+    
+    streams = get_resumable_streams()
+    stream_id = await streams.start(user_id, generate)
+    
+    return StreamingResponse(
+        streams.subscribe(stream_id, None, http_request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"X-Stream-Id": stream_id}
+    )
+
+
+@router.get("/stream/{stream_id}")
+async def resume_stream(
+    stream_id: str,
+    http_request: Request,
+    last_event_id: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Reattach to a running or recently finished stream after a dropped connection."""
+    streams = get_resumable_streams()
+    
+    if await streams.owner(stream_id) != user_id:
+        raise HTTPException(status_code=404, detail="Stream not found or expired")
     
-    return StreamingResponse(generate(), media_type="text/event-stream")
+    return StreamingResponse(
+        streams.subscribe(stream_id, last_event_id, http_request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"X-Stream-Id": stream_id}
+    )
 
 
 @router.post("/upload")
@@ -215,14 +285,15 @@ async def upload_file(
         raise HTTPException(status_code=400, detail=result["error"])
     
     # Save to database
-    file_record = supabase.table("file_uploads").insert({
-        "user_id": user_id,
-        "filename": file.filename,
-        "file_type": file.content_type,
-        "file_size": len(content),
-        "processed_at": "now()",
-        "insights": result
-    }).execute()
+    with span("supabase.file_uploads.insert"):
+        file_record = get_supabase().table("file_uploads").insert({
+            "user_id": user_id,
+            "filename": file.filename,
+            "file_type": file.content_type,
+            "file_size": len(content),
+            "processed_at": "now()",
+            "insights": result
+        }).execute()
     
     return {
         "file_id": file_record.data[0]["id"],
@@ -234,11 +305,12 @@ async def upload_file(
 @router.get("/conversations")
 async def get_conversations(user_id: str = Depends(get_current_user_id)):
     """Get user's conversation list."""
-    result = supabase.table("conversations")\
-        .select("*")\
-        .eq("user_id", user_id)\
-        .order("updated_at", desc=True)\
-        .execute()
+    with span("supabase.conversations.select"):
+        result = get_supabase().table("conversations")\
+            .select("*")\
+            .eq("user_id", user_id)\
+            .order("updated_at", desc=True)\
+            .execute()
     
     return {"conversations": result.data}
 
@@ -250,22 +322,24 @@ async def get_conversation(
 ):
     """Get conversation messages."""
     # Verify ownership
-    conv = supabase.table("conversations")\
-        .select("*")\
-        .eq("id", conversation_id)\
-        .eq("user_id", user_id)\
-        .maybeSingle()\
-        .execute()
+    with span("supabase.conversations.select"):
+        conv = get_supabase().table("conversations")\
+            .select("*")\
+            .eq("id", conversation_id)\
+            .eq("user_id", user_id)\
+            .maybeSingle()\
+            .execute()
     
     if not conv.data:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     # Get messages
-    messages = supabase.table("messages")\
-        .select("*")\
-        .eq("conversation_id", conversation_id)\
-        .order("timestamp", desc=False)\
-        .execute()
+    with span("supabase.messages.select"):
+        messages = get_supabase().table("messages")\
+            .select("*")\
+            .eq("conversation_id", conversation_id)\
+            .order("timestamp", desc=False)\
+            .execute()
     
     return {
         "conversation": conv.data,
@@ -280,26 +354,29 @@ async def delete_conversation(
 ):
     """Delete a conversation."""
     # Verify ownership
-    conv = supabase.table("conversations")\
-        .select("*")\
-        .eq("id", conversation_id)\
-        .eq("user_id", user_id)\
-        .maybeSingle()\
-        .execute()
+    with span("supabase.conversations.select"):
+        conv = get_supabase().table("conversations")\
+            .select("*")\
+            .eq("id", conversation_id)\
+            .eq("user_id", user_id)\
+            .maybeSingle()\
+            .execute()
     
     if not conv.data:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     # Delete messages first
-    supabase.table("messages")\
-        .delete()\
-        .eq("conversation_id", conversation_id)\
-        .execute()
+    with span("supabase.messages.delete"):
+        get_supabase().table("messages")\
+            .delete()\
+            .eq("conversation_id", conversation_id)\
+            .execute()
     
     # Delete conversation
-    supabase.table("conversations")\
-        .delete()\
-        .eq("id", conversation_id)\
-        .execute()
+    with span("supabase.conversations.delete"):
+        get_supabase().table("conversations")\
+            .delete()\
+            .eq("id", conversation_id)\
+            .execute()
     
     return {"message": "Conversation deleted successfully"}
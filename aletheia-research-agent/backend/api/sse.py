@@ -0,0 +1,221 @@
+"""Server-sent event framing for streamed chat responses."""
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from tracing import observe
+
+
+# SSE comment line: keeps proxies/load balancers from closing idle streams
+HEARTBEAT_FRAME = ": ping\n\n"
+
+# Sentinel marking the end of the upstream iterator in the pump queue
+_END = object()
+
+
+def sse_frame(payload: Dict) -> str:
+    """Encode one SSE data frame."""
+    return f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+class StreamTranscript:
+    """Everything the client was sent, accumulated without string concatenation."""
+
+    def __init__(self):
+        self.text_parts: List[str] = []
+        self.thinking: List[str] = []
+        self.usage: Dict = {}
+        self.completed = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.text_parts)
+
+
+class DeltaCoalescer:
+    """
+    Buffers consecutive text/thinking deltas into one frame.
+
+    Token deltas are often a few characters each; encoding and sending each
+    one separately costs a json.dumps, a write and a network packet per
+    token. Deltas of the same kind are appended to a list and emitted as a
+    single frame when `max_chars` is reached, the kind changes, or the
+    caller flushes on its time window.
+    """
+
+    def __init__(self, max_chars: int = 512):
+        self.max_chars = max_chars
+        self._kind: Optional[str] = None
+        self._parts: List[str] = []
+        self._size = 0
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._parts)
+
+    def add(self, kind: str, text: str) -> List[str]:
+        """
+        Buffer a delta
+
+        Returns:
+            Frames that must be sent now (possibly empty)
+        """
+        frames = []
+        if self._kind is not None and kind != self._kind:
+            frames.extend(self.flush())
+
+        self._kind = kind
+        self._parts.append(text)
+        self._size += len(text)
+
+        if self._size >= self.max_chars:
+            frames.extend(self.flush())
+
+        return frames
+
+    def flush(self) -> List[str]:
+        """Emit whatever is buffered as one frame."""
+        if not self._parts:
+            return []
+
+        frame = sse_frame({"type": self._kind, "content": "".join(self._parts)})
+        self._kind = None
+        self._parts = []
+        self._size = 0
+        return [frame]
+
+
+async def coalesced_sse(
+    chunks: AsyncIterator[Dict],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    transcript: StreamTranscript,
+    on_done: Callable[[StreamTranscript], Awaitable[Optional[Dict]]],
+    on_abort: Optional[Callable[[StreamTranscript], Awaitable[None]]] = None,
+    flush_interval: float = 0.05,
+    max_chars: int = 512,
+    heartbeat_interval: float = 15.0,
+    disconnect_poll_interval: float = 1.0
+) -> AsyncIterator[str]:
+    """
+    Turn LLM stream chunks into coalesced SSE frames.
+
+    The upstream stream is pumped by a background task into a queue so the
+    frame loop can flush on a time window, emit heartbeats while the model
+    is thinking, and poll for client disconnect without ever cancelling a
+    pending read on the upstream iterator. When the client goes away (or
+    this generator is closed by the server), the upstream stream is closed
+    immediately so the provider stops generating tokens nobody will read.
+    Time to the first content frame and the whole stream's duration are
+    recorded as "sse.first_frame" and "sse.stream" spans.
+
+    Args:
+        chunks: LLM stream chunks (text_delta / thinking_delta / done)
+        is_disconnected: Async check for client disconnect
+        transcript: Collects the streamed text, thinking and usage
+        on_done: Awaited with the completed transcript on the upstream done
+            chunk; may return an extra payload merged into the done frame
+        on_abort: Awaited with the partial transcript if the stream ends
+            without a done chunk (client disconnect, upstream error)
+        flush_interval: Longest a buffered delta waits before being sent
+        max_chars: Buffered characters that force an immediate frame
+        heartbeat_interval: Idle seconds before a heartbeat comment
+        disconnect_poll_interval: Seconds between disconnect checks
+
+    Yields:
+        SSE frames
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+
+    async def pump():
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_END)
+
+    pump_task = asyncio.create_task(pump())
+    coalescer = DeltaCoalescer(max_chars)
+    loop = asyncio.get_running_loop()
+    started = last_sent = loop.time()
+    first_frame_sent = False
+    next_disconnect_check = last_sent + disconnect_poll_interval
+    flush_at: Optional[float] = None
+
+    try:
+        while True:
+            now = loop.time()
+            deadlines = [last_sent + heartbeat_interval, next_disconnect_check]
+            if flush_at is not None:
+                deadlines.append(flush_at)
+
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=max(0.0, min(deadlines) - now))
+            except asyncio.TimeoutError:
+                item = None
+
+            now = loop.time()
+            frames: List[str] = []
+
+            if item is _END:
+                frames.extend(coalescer.flush())
+                for frame in frames:
+                    yield frame
+                return
+
+            if isinstance(item, Exception):
+                raise item
+
+            if item is not None:
+                if item["type"] == "text_delta":
+                    transcript.text_parts.append(item["text"])
+                    frames.extend(coalescer.add("text", item["text"]))
+                elif item["type"] == "thinking_delta":
+                    transcript.thinking.append(item["thinking"])
+                    frames.extend(coalescer.add("thinking", item["thinking"]))
+                elif item["type"] == "done":
+                    frames.extend(coalescer.flush())
+                    transcript.usage = item.get("usage", {})
+                    transcript.completed = True
+                    extra = await on_done(transcript) or {}
+                    frames.append(sse_frame({"type": "done", **extra}))
+
+                if coalescer.pending and flush_at is None:
+                    flush_at = now + flush_interval
+
+            if flush_at is not None and now >= flush_at:
+                frames.extend(coalescer.flush())
+            if not coalescer.pending:
+                flush_at = None
+
+            if now >= next_disconnect_check:
+                next_disconnect_check = now + disconnect_poll_interval
+                if await is_disconnected():
+                    return
+
+            if not frames and now - last_sent >= heartbeat_interval:
+                frames.append(HEARTBEAT_FRAME)
+
+            if frames:
+                if not first_frame_sent and frames[0] != HEARTBEAT_FRAME:
+                    first_frame_sent = True
+                    observe("sse.first_frame", now - started)
+                last_sent = now
+                for frame in frames:
+                    yield frame
+
+    finally:
+        # Stop upstream generation as soon as nobody is listening
+        pump_task.cancel()
+        try:
+            await pump_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+        observe("sse.stream", loop.time() - started, "ok" if transcript.completed else "cancelled")
+
+        if on_abort is not None and not transcript.completed:
+            await on_abort(transcript)
@@ -0,0 +1,378 @@
+"""Resumable SSE streams: generation decoupled from the client connection."""
+import asyncio
+import re
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from config import settings
+from api.sse import HEARTBEAT_FRAME, sse_frame
+
+
+Event = Tuple[str, str]  # (event id within the stream, SSE frame)
+
+_REDIS_ID = re.compile(r"\d+(-\d+)?")
+
+
+def _stream_id(value: str) -> Tuple[int, int]:
+    """Redis stream id as a comparable (milliseconds, sequence) pair."""
+    ms, _, seq = value.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class _MemoryStream:
+    """Ring buffer and listener state for one stream."""
+
+    def __init__(self, owner: str, max_events: int):
+        self.owner = owner
+        self.events: deque = deque(maxlen=max_events)
+        self.next_seq = 1
+        self.finished = False
+        self.finished_at = 0.0
+        self.last_listener_at = time.monotonic()
+        self.changed = asyncio.Condition()
+
+
+class MemoryReplayStore:
+    """
+    Per-process replay buffer.
+
+    Keeps the last `max_events` frames of each stream in a ring buffer and
+    drops finished streams `ttl` seconds after they end. Reconnects must
+    reach the same worker; use RedisReplayStore when running several.
+    """
+
+    def __init__(self, max_events: int = 2000, ttl: float = 300.0):
+        self.max_events = max_events
+        self.ttl = ttl
+        self._streams: Dict[str, _MemoryStream] = {}
+
+    def _prune(self):
+        now = time.monotonic()
+        expired = [
+            stream_id for stream_id, stream in self._streams.items()
+            if stream.finished and now - stream.finished_at > self.ttl
+        ]
+        for stream_id in expired:
+            del self._streams[stream_id]
+
+    async def create(self, stream_id: str, owner: str):
+        self._prune()
+        self._streams[stream_id] = _MemoryStream(owner, self.max_events)
+
+    async def owner(self, stream_id: str) -> Optional[str]:
+        stream = self._streams.get(stream_id)
+        return stream.owner if stream else None
+
+    async def append(self, stream_id: str, frame: str):
+        stream = self._streams[stream_id]
+        async with stream.changed:
+            stream.events.append((str(stream.next_seq), frame))
+            stream.next_seq += 1
+            stream.changed.notify_all()
+
+    async def finish(self, stream_id: str):
+        stream = self._streams[stream_id]
+        async with stream.changed:
+            stream.finished = True
+            stream.finished_at = time.monotonic()
+            stream.changed.notify_all()
+
+    async def read(
+        self,
+        stream_id: str,
+        after: Optional[str],
+        timeout: float
+    ) -> Tuple[List[Event], bool, bool]:
+        """
+        Events after `after`, waiting up to `timeout` for new ones
+
+        Returns:
+            (events, finished, gap) where gap means events after `after`
+            were already evicted from the ring buffer
+        """
+        stream = self._streams.get(stream_id)
+        if stream is None:
+            return [], True, False
+
+        try:
+            after_seq = max(0, int(after)) if after else 0
+        except ValueError:
+            # Malformed Last-Event-ID: replay from the start
+            after_seq = 0
+
+        async with stream.changed:
+            if not stream.finished and (not stream.events or int(stream.events[-1][0]) <= after_seq):
+                try:
+                    await asyncio.wait_for(stream.changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            events = [event for event in stream.events if int(event[0]) > after_seq]
+            gap = bool(stream.events) and int(stream.events[0][0]) > after_seq + 1
+            return events, stream.finished, gap
+
+    async def touch_listener(self, stream_id: str, grace: float):
+        stream = self._streams.get(stream_id)
+        if stream is not None:
+            stream.last_listener_at = time.monotonic()
+
+    async def has_listener(self, stream_id: str, grace: float) -> bool:
+        stream = self._streams.get(stream_id)
+        return stream is not None and time.monotonic() - stream.last_listener_at < grace
+
+
+class RedisReplayStore:
+    """
+    Replay buffer shared across workers through Redis streams.
+
+    Frames are XADDed to a capped stream per chat stream; any worker can
+    serve a reconnect by XREADing from the client's Last-Event-ID. Listener
+    presence is a key refreshed by whichever worker the client is attached
+    to, so the producing worker knows whether anyone is still reading.
+    """
+
+    def __init__(self, redis_url: str, max_events: int = 2000, ttl: float = 300.0):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.max_events = max_events
+        self.ttl = int(ttl)
+
+    @staticmethod
+    def _key(stream_id: str, part: str) -> str:
+        return f"aletheia:sse:{stream_id}:{part}"
+
+    async def create(self, stream_id: str, owner: str):
+        meta = self._key(stream_id, "meta")
+        await self.redis.hset(meta, mapping={"owner": owner, "finished": 0})
+        await self.redis.expire(meta, self.ttl)
+
+    async def owner(self, stream_id: str) -> Optional[str]:
+        return await self.redis.hget(self._key(stream_id, "meta"), "owner")
+
+    async def append(self, stream_id: str, frame: str):
+        events = self._key(stream_id, "events")
+        await self.redis.xadd(events, {"frame": frame}, maxlen=self.max_events, approximate=True)
+        await self.redis.expire(events, self.ttl)
+
+    async def finish(self, stream_id: str):
+        meta = self._key(stream_id, "meta")
+        await self.redis.hset(meta, "finished", 1)
+        await self.redis.expire(meta, self.ttl)
+        await self.redis.expire(self._key(stream_id, "events"), self.ttl)
+
+    async def read(
+        self,
+        stream_id: str,
+        after: Optional[str],
+        timeout: float
+    ) -> Tuple[List[Event], bool, bool]:
+        # Check finished before reading: the producer appends its last frames
+        # before marking the stream finished, so a read that starts after a
+        # finished check always includes them
+        finished = await self.redis.hget(self._key(stream_id, "meta"), "finished") in (None, "1")
+
+        if not after or not _REDIS_ID.fullmatch(after):
+            # Missing or malformed Last-Event-ID: replay from the start
+            after = "0-0"
+
+        response = await self.redis.xread(
+            {self._key(stream_id, "events"): after},
+            count=500,
+            block=None if finished else max(1, int(timeout * 1000))
+        )
+        events = [
+            (event_id, fields["frame"])
+            for _, entries in response
+            for event_id, fields in entries
+        ]
+        gap = bool(events) and await self._trimmed_after(stream_id, after, events[0][0])
+        return events, finished, gap
+
+    async def _trimmed_after(self, stream_id: str, after: str, first_read: str) -> bool:
+        """
+        Whether entries after `after` were trimmed by XADD's MAXLEN
+
+        Redis 7+ reports the newest trimmed id; older servers only tell us
+        the oldest entry left, so a read that starts there after a real
+        Last-Event-ID may have missed something and is reported as a gap.
+        """
+        info = await self.redis.xinfo_stream(self._key(stream_id, "events"))
+
+        max_deleted = info.get("max-deleted-entry-id")
+        if max_deleted is not None:
+            return _stream_id(max_deleted) > _stream_id(after)
+
+        first_entry = info.get("first-entry")
+        return (
+            after != "0-0"
+            and first_entry is not None
+            and first_entry[0] == first_read
+        )
+
+    async def touch_listener(self, stream_id: str, grace: float):
+        await self.redis.set(self._key(stream_id, "listener"), 1, px=int(grace * 1000))
+
+    async def has_listener(self, stream_id: str, grace: float) -> bool:
+        return bool(await self.redis.exists(self._key(stream_id, "listener")))
+
+
+class ResumableStreams:
+    """
+    Runs chat generations independently of the connections reading them.
+
+    `start` launches the producer as a background task that appends every
+    frame to the replay store; `subscribe` serves frames to a connection,
+    tagging each with an SSE `id:` of "<stream_id>:<event_id>". A client
+    that reconnects with Last-Event-ID picks up where it left off while
+    generation carries on. If no client has been attached for
+    `resume_grace` seconds, the producer is told to stop so abandoned
+    generations don't keep spending tokens.
+    """
+
+    def __init__(
+        self,
+        store,
+        resume_grace: float = 15.0,
+        heartbeat_interval: float = 15.0,
+        poll_interval: float = 1.0
+    ):
+        self.store = store
+        self.resume_grace = resume_grace
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self._producers: Dict[str, asyncio.Task] = {}
+        self.connections = 0
+
+    async def abandoned(self, stream_id: str) -> bool:
+        """True once no client has been attached for the resume grace period."""
+        return not await self.store.has_listener(stream_id, self.resume_grace)
+
+    async def start(
+        self,
+        owner: str,
+        produce: Callable[[Callable[[], Awaitable[bool]]], AsyncIterator[str]]
+    ) -> str:
+        """
+        Start a generation
+
+        Args:
+            owner: User id allowed to attach to the stream
+            produce: Called with an abandonment check; returns the SSE
+                frame iterator for the generation
+
+        Returns:
+            Stream id
+        """
+        stream_id = uuid.uuid4().hex
+        await self.store.create(stream_id, owner)
+
+        async def run():
+            try:
+                async for frame in produce(lambda: self.abandoned(stream_id)):
+                    if frame != HEARTBEAT_FRAME:
+                        await self.store.append(stream_id, frame)
+            except Exception as e:
+                print(f"Stream {stream_id} producer failed: {e}")
+            finally:
+                await self.store.finish(stream_id)
+                self._producers.pop(stream_id, None)
+
+        self._producers[stream_id] = asyncio.create_task(run())
+        return stream_id
+
+    async def owner(self, stream_id: str) -> Optional[str]:
+        return await self.store.owner(stream_id)
+
+    def stats(self) -> Dict:
+        """Generations running in this process and connections attached to them."""
+        return {"generations": len(self._producers), "connections": self.connections}
+
+    async def subscribe(
+        self,
+        stream_id: str,
+        last_event_id: Optional[str],
+        is_disconnected: Callable[[], Awaitable[bool]]
+    ) -> AsyncIterator[str]:
+        """
+        Serve a stream's frames to one connection
+
+        Args:
+            stream_id: Stream to read
+            last_event_id: Last-Event-ID from the client ("<stream_id>:<event_id>"
+                or bare event id); None to start from the beginning
+            is_disconnected: Async check for client disconnect
+
+        Yields:
+            SSE frames with ids, plus heartbeats while waiting
+        """
+        after = None
+        if last_event_id:
+            prefix, _, event_id = last_event_id.rpartition(":")
+            if not prefix or prefix == stream_id:
+                after = event_id
+
+        self.connections += 1
+        try:
+            async for frame in self._serve(stream_id, after, is_disconnected):
+                yield frame
+        finally:
+            self.connections -= 1
+
+    async def _serve(
+        self,
+        stream_id: str,
+        after: Optional[str],
+        is_disconnected: Callable[[], Awaitable[bool]]
+    ) -> AsyncIterator[str]:
+        last_sent = time.monotonic()
+
+        while True:
+            await self.store.touch_listener(stream_id, self.resume_grace)
+            events, finished, gap = await self.store.read(stream_id, after, self.poll_interval)
+
+            if gap:
+                yield sse_frame({"type": "gap"})
+
+            for event_id, frame in events:
+                yield f"id: {stream_id}:{event_id}\n{frame}"
+                after = event_id
+
+            if events or gap:
+                last_sent = time.monotonic()
+            elif finished:
+                return
+            elif time.monotonic() - last_sent >= self.heartbeat_interval:
+                yield HEARTBEAT_FRAME
+                last_sent = time.monotonic()
+
+            if await is_disconnected():
+                return
+
+
+def _build_store():
+    if settings.sse_replay_backend == "redis":
+        return RedisReplayStore(
+            settings.redis_url,
+            max_events=settings.sse_replay_max_events,
+            ttl=settings.sse_replay_ttl_seconds
+        )
+    return MemoryReplayStore(
+        max_events=settings.sse_replay_max_events,
+        ttl=settings.sse_replay_ttl_seconds
+    )
+
+
+# Global stream registry
+resumable_streams = None
+
+def get_resumable_streams() -> ResumableStreams:
+    """Get or create the resumable stream registry."""
+    global resumable_streams
+    if resumable_streams is None:
+        resumable_streams = ResumableStreams(
+            _build_store(),
+            resume_grace=settings.sse_resume_grace_seconds
+        )
+    return resumable_streams
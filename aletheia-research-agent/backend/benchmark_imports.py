@@ -0,0 +1,118 @@
+"""
+Import-time benchmark for backend startup.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, reports
+the slowest top-level packages and optionally enforces a startup budget and
+appends results to a history file so regressions show up over time.
+
+Usage:
+    python benchmark_imports.py
+    python benchmark_imports.py --budget-ms 800 --history import_times.jsonl
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+# Settings() requires these; placeholders are enough to import the app
+PLACEHOLDER_ENV = {
+    "SUPABASE_URL": "https://example.supabase.co",
+    "SUPABASE_ANON_KEY": "placeholder",
+    "SUPABASE_SERVICE_ROLE_KEY": "placeholder",
+    "JWT_SECRET_KEY": "placeholder",
+}
+
+
+def measure(module: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        (name, depth, self_us, cumulative_us) for every imported module
+    """
+    env = {**PLACEHOLDER_ENV, **os.environ}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+
+    return rows
+
+
+def summarize(rows: List[Tuple[str, int, int, int]], module: str) -> Dict:
+    """Total import time of the module and self time grouped by top-level package."""
+    total_us = next((cumulative for name, _, _, cumulative in rows if name == module), 0)
+
+    packages: Dict[str, int] = defaultdict(int)
+    for name, _, self_us, _ in rows:
+        packages[name.split(".")[0]] += self_us
+
+    return {"total_us": total_us, "packages": dict(packages)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend import time")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs; the fastest is reported")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list")
+    parser.add_argument("--budget-ms", type=float, help="Exit non-zero if total exceeds this")
+    parser.add_argument("--history", help="Append results as a JSON line to this file")
+    args = parser.parse_args()
+
+    runs = [summarize(measure(args.module), args.module) for _ in range(args.repeat)]
+    best = min(runs, key=lambda run: run["total_us"])
+
+    # Per-package minimum across runs filters out noise from a single slow run
+    packages = {
+        package: min(run["packages"].get(package, 0) for run in runs)
+        for package in best["packages"]
+    }
+    total_ms = best["total_us"] / 1000
+
+    print(f"import {args.module}: {total_ms:.1f} ms (best of {args.repeat})")
+    print(f"\n{'package':<30} {'self ms':>10}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<30} {self_us / 1000:>10.1f}")
+
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps({
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "module": args.module,
+                "python": sys.version.split()[0],
+                "total_ms": round(total_ms, 1),
+                "packages_ms": {
+                    package: round(self_us / 1000, 1)
+                    for package, self_us in packages.items()
+                    if self_us >= 1000
+                }
+            }) + "\n")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\nOver budget: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,25 @@ class Settings(BaseSettings):
     minimax_api_key: Optional[str] = None
     minimax_base_url: str = "https://api.minimax.io/anthropic"
     minimax_model: str = "claude-3-5-sonnet-20241022"
+    minimax_prompt_caching: bool = False
+    
+    # LLM response cache (shared across users; opt in)
+    llm_cache_enabled: bool = False
+    llm_cache_ttl_seconds: int = 3600
+    llm_cache_max_entries: int = 1000
+    llm_semantic_cache_enabled: bool = False
+    llm_semantic_cache_threshold: float = 0.92
+    
+    # LLM gateway
+    llm_max_in_flight: int = 8
+    llm_max_retries: int = 3
+    llm_interactive_timeout_seconds: float = 60.0
+    llm_batch_timeout_seconds: float = 300.0
+    llm_http_max_connections: int = 32
+    
+    # LLM routing: JSON list of {"name", "base_url", "api_key", "model", "prompt_caching"}; empty uses MINIMAX_*
+    llm_endpoints: str = ""
+    llm_hedging_enabled: bool = True
     
     # Tavily API
     tavily_api_key: Optional[str] = None
@@ -28,6 +47,28 @@ class Settings(BaseSettings):
     jwt_access_token_expire_minutes: int = 60
     jwt_refresh_token_expire_days: int = 7
     
+    # Research agent
+    research_max_sub_queries: int = 3
+    research_decompose_min_words: int = 8
+    research_context_token_budget: int = 3000
+    research_rerank_embeddings: bool = False
+    research_fast_path_enabled: bool = True
+    research_cache_enabled: bool = False
+    research_cache_ttl_seconds: int = 900
+    research_cache_max_entries: int = 500
+    research_max_concurrent_runs: int = 8
+    research_queue_timeout_seconds: float = 30.0
+    research_warm_up: bool = True
+    
+    # Prometheus /metrics endpoint and request/event-loop instrumentation
+    metrics_enabled: bool = True
+    
+    # Resumable SSE streams ("memory" per worker, or "redis" across workers)
+    sse_replay_backend: str = "memory"
+    sse_replay_max_events: int = 2000
+    sse_replay_ttl_seconds: int = 300
+    sse_resume_grace_seconds: float = 15.0
+    
     # Rate Limiting
     rate_limit_per_minute: int = 20
     
@@ -0,0 +1,189 @@
+"""Shared Supabase client and write-behind message persistence."""
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from config import settings
+from tracing import span
+
+
+# Global client instance
+supabase_client = None
+
+def get_supabase():
+    """
+    Get or create the Supabase client.
+
+    The supabase SDK is imported on first use rather than at startup; it is
+    one of the heaviest imports in the app.
+    """
+    global supabase_client
+    if supabase_client is None:
+        from supabase import create_client
+        supabase_client = create_client(settings.supabase_url, settings.supabase_service_role_key)
+    return supabase_client
+
+
+# Every message row carries all columns so rows can share one bulk insert
+MESSAGE_DEFAULTS = {
+    "thinking_trace": None,
+    "sources": None,
+    "metadata": {}
+}
+
+
+class MessageWriter:
+    """
+    Write-behind persistence for chat messages (or rows of another table).
+
+    Callers submit rows and return immediately; a background task batches
+    them into bulk inserts and retries failures with backoff. Each row gets
+    its id and timestamp when submitted, so ids can be returned to the
+    client straight away and conversation order doesn't depend on when
+    the batch reaches the database.
+    """
+
+    def __init__(
+        self,
+        table: str = "messages",
+        defaults: Optional[Dict] = None,
+        batch_size: int = 50,
+        flush_interval: float = 0.1,
+        max_retries: int = 5
+    ):
+        """
+        Initialize message writer.
+
+        Args:
+            table: Table the rows are inserted into
+            defaults: Values for columns a row may omit (rows in one bulk
+                insert must share the same columns)
+            batch_size: Maximum rows per insert
+            flush_interval: Seconds to wait for more rows before inserting
+            max_retries: Insert attempts before a batch falls back to
+                per-row writes
+        """
+        self.table = table
+        self.defaults = MESSAGE_DEFAULTS if defaults is None else defaults
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def submit(self, message: Dict) -> str:
+        """
+        Queue a row for insertion.
+
+        Args:
+            message: Row for the writer's table
+
+        Returns:
+            The row id
+        """
+        row = {
+            **self.defaults,
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            **message
+        }
+
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        self._queue.put_nowait(row)
+        return row["id"]
+
+    async def _run(self):
+        """Drain the queue in batches."""
+        while True:
+            batch = [await self._queue.get()]
+
+            # Give concurrent submitters a moment to join this batch
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._insert(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _insert(self, batch: List[Dict]):
+        """
+        Insert one batch, retrying with exponential backoff.
+
+        If the batch still fails it is written row by row, so one bad row
+        (e.g. a message for a conversation deleted meanwhile) only drops
+        itself and not the other rows sharing its batch.
+        """
+        for attempt in range(self.max_retries):
+            try:
+                await self._write(batch)
+                return
+            except Exception as e:
+                print(f"{self.table} write failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+                if attempt + 1 < self.max_retries:
+                    await asyncio.sleep(min(30.0, 0.5 * (2 ** attempt)))
+
+        if len(batch) == 1:
+            print(f"Dropping 1 {self.table} row after {self.max_retries} failed writes")
+            return
+
+        dropped = 0
+        for row in batch:
+            try:
+                await self._write([row])
+            except Exception as e:
+                dropped += 1
+                print(f"Dropping {self.table} row {row.get('id')}: {e}")
+
+        if dropped:
+            print(f"Dropped {dropped} of {len(batch)} {self.table} rows after falling back to per-row writes")
+
+    async def _write(self, rows: List[Dict]):
+        """Insert rows in one request."""
+        # supabase-py is synchronous; keep it off the event loop
+        with span(f"supabase.{self.table}.insert", rows=len(rows)):
+            await asyncio.to_thread(
+                lambda: get_supabase().table(self.table).insert(rows).execute()
+            )
+
+    async def flush(self):
+        """Wait until every submitted message has been written (or dropped)."""
+        if self._queue is not None and self._worker is not None and not self._worker.done():
+            await self._queue.join()
+
+    async def close(self):
+        """Flush pending messages and stop the background task."""
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+# Global writer instances
+message_writer = MessageWriter()
+search_query_writer = MessageWriter(table="search_queries", defaults={})
+
+def get_message_writer() -> MessageWriter:
+    """Get the write-behind message writer."""
+    return message_writer
+
+
+def get_search_query_writer() -> MessageWriter:
+    """Get the write-behind writer for search query timings."""
+    return search_query_writer
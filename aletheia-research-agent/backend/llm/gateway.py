@@ -0,0 +1,317 @@
+"""Concurrency-limited, retrying gateway in front of the LLM client."""
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import AsyncIterator, Dict, List, Optional
+from config import settings
+from llm.router import LLMRouter, get_llm_router, is_retryable_error
+
+
+class Priority(IntEnum):
+    """Admission priority; lower values are served first."""
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+class LLMUnavailableError(Exception):
+    """The call could not be completed before its deadline or retry budget ran out."""
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a provider error's retry-after header, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class _Timeout:
+    """
+    Cancel the enclosing block after `delay` seconds.
+
+    A stand-in for asyncio.timeout(), which only exists on Python 3.11+.
+    On expiry the current task is cancelled and the CancelledError is
+    turned into asyncio.TimeoutError when the block exits; `reschedule(None)`
+    disarms it.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.expired = False
+        self._task = None
+        self._handle = None
+
+    async def __aenter__(self) -> "_Timeout":
+        self._task = asyncio.current_task()
+        self.reschedule(asyncio.get_running_loop().time() + self.delay)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        self.reschedule(None)
+        if self.expired and exc_type is asyncio.CancelledError:
+            raise asyncio.TimeoutError() from exc
+        return False
+
+    def reschedule(self, when: Optional[float]):
+        """Move the deadline to loop time `when`, or disarm it with None."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if when is not None:
+            self._handle = asyncio.get_running_loop().call_at(when, self._expire)
+
+    def _expire(self):
+        self.expired = True
+        self._task.cancel()
+
+
+class LLMGateway:
+    """
+    Admission control and retry policy for LLM calls.
+
+    At most `max_in_flight` calls run against the provider at once; the
+    rest wait in a priority queue so interactive chat is admitted ahead of
+    batch work. Retryable failures back off exponentially with full jitter,
+    honoring the provider's retry-after, and every call has a deadline that
+    covers queueing and retries, so a load spike turns into bounded waiting
+    and a clean LLMUnavailableError instead of piled-up requests.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        max_in_flight: int = 8,
+        max_retries: int = 3,
+        interactive_timeout: float = 60.0,
+        batch_timeout: float = 300.0,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 20.0
+    ):
+        self._client = client
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.timeouts = {
+            Priority.INTERACTIVE: interactive_timeout,
+            Priority.BATCH: batch_timeout
+        }
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.in_flight = 0
+        self._waiters: List = []
+        self._sequence = itertools.count()
+
+    @property
+    def client(self):
+        """Underlying LLM client (the endpoint router by default), resolved on first use."""
+        if self._client is None:
+            self._client = get_llm_router()
+        return self._client
+    
+    def _client_kwargs(self, priority: Priority, kwargs: Dict) -> Dict:
+        """Only interactive calls are worth a hedged duplicate request."""
+        if isinstance(self.client, LLMRouter):
+            kwargs.setdefault("hedge", priority == Priority.INTERACTIVE)
+        return kwargs
+
+    @property
+    def queued(self) -> int:
+        """Calls waiting for a slot."""
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE):
+        """Hold one in-flight slot, waiting in priority order if none is free."""
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self.in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+            try:
+                # The releasing call hands its slot over directly
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                raise
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        """Pass the slot to the highest-priority waiter, or free it."""
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _deadline(self, priority: Priority, timeout: Optional[float]) -> float:
+        return time.monotonic() + (timeout if timeout is not None else self.timeouts[priority])
+
+    async def generate_response(
+        self,
+        messages: List[Dict],
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> Dict:
+        """
+        Generate a non-streaming response through the gateway.
+
+        Args:
+            messages: Conversation messages, newest last
+            priority: Admission class for this call
+            timeout: Overall deadline in seconds (queueing + retries);
+                defaults to the priority's timeout
+            **kwargs: Passed through to the client (temperature, max_tokens...)
+
+        Returns:
+            Client response dict
+
+        Raises:
+            LLMUnavailableError: Deadline or retry budget exhausted
+        """
+        deadline = self._deadline(priority, timeout)
+        kwargs = self._client_kwargs(priority, kwargs)
+        attempt = 0
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMUnavailableError("LLM call deadline exceeded")
+
+            try:
+                async with _Timeout(remaining):
+                    async with self.slot(priority):
+                        return await self.client.generate_response(messages, **kwargs)
+            except asyncio.TimeoutError as e:
+                raise LLMUnavailableError("LLM call deadline exceeded") from e
+            except Exception as e:
+                if not is_retryable_error(e):
+                    raise
+                if attempt >= self.max_retries:
+                    raise LLMUnavailableError(f"LLM unavailable after {attempt + 1} attempts: {e}") from e
+
+                delay = self._backoff(attempt, e)
+                if time.monotonic() + delay >= deadline:
+                    raise LLMUnavailableError(f"LLM unavailable before deadline: {e}") from e
+
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def generate_streaming_response(
+        self,
+        messages: List[Dict],
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream a response through the gateway.
+
+        The slot is held for the whole stream. Failures are retried only
+        until the first chunk has been yielded; after that the caller has
+        partial output and the error is raised as is. The deadline applies
+        to time-to-first-chunk.
+
+        Raises:
+            LLMUnavailableError: No chunk received before the deadline or
+                retry budget ran out
+        """
+        deadline = self._deadline(priority, timeout)
+        kwargs = self._client_kwargs(priority, kwargs)
+        attempt = 0
+
+        while True:
+            started = False
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+
+                async with _Timeout(remaining) as first_chunk:
+                    async with self.slot(priority):
+                        async for chunk in self.client.generate_streaming_response(messages, **kwargs):
+                            if not started:
+                                started = True
+                                first_chunk.reschedule(None)
+                            yield chunk
+                return
+
+            except asyncio.TimeoutError as e:
+                if started:
+                    raise
+                raise LLMUnavailableError("LLM stream did not start before deadline") from e
+            except Exception as e:
+                if started:
+                    raise
+                if not is_retryable_error(e):
+                    raise
+                if attempt >= self.max_retries:
+                    raise LLMUnavailableError(f"LLM unavailable after {attempt + 1} attempts: {e}") from e
+
+                delay = self._backoff(attempt, e)
+                if time.monotonic() + delay >= deadline:
+                    raise LLMUnavailableError(f"LLM unavailable before deadline: {e}") from e
+
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict:
+        """Current admission state."""
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight
+        }
+
+
+# Global gateway instance
+llm_gateway = None
+
+def get_llm_gateway() -> LLMGateway:
+    """Get or create the LLM gateway."""
+    global llm_gateway
+    if llm_gateway is None:
+        llm_gateway = LLMGateway(
+            max_in_flight=settings.llm_max_in_flight,
+            max_retries=settings.llm_max_retries,
+            interactive_timeout=settings.llm_interactive_timeout_seconds,
+            batch_timeout=settings.llm_batch_timeout_seconds
+        )
+    return llm_gateway
@@ -1,29 +1,86 @@
 """MiniMax LLM client using Anthropic SDK."""
-from anthropic import Anthropic, AsyncAnthropic
-from typing import List, Dict, Optional, AsyncIterator
+import time
+from typing import List, Dict, Optional, AsyncIterator, Union
 from config import settings
+from llm.response_cache import ResponseCache
+from tracing import observe, span
+from metrics import record_llm_usage
+
+
+# Marks the end of a prompt prefix the provider may cache and reuse
+CACHE_CONTROL = {"type": "ephemeral"}
 
 
 class MiniMaxClient:
     """Client for MiniMax-M2 API using Anthropic SDK."""
     
-    def __init__(self):
-        """Initialize MiniMax client."""
-        if not settings.minimax_api_key:
-            raise ValueError("MINIMAX_API_KEY is required but not set")
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        prompt_caching: Optional[bool] = None
+    ):
+        """
+        Initialize MiniMax client.
         
-        self.client = Anthropic(
-            api_key=settings.minimax_api_key,
-            base_url=settings.minimax_base_url
-        )
+        Args:
+            api_key: API key (defaults to MINIMAX_API_KEY)
+            base_url: Anthropic-compatible endpoint (defaults to MINIMAX_BASE_URL)
+            model: Model name (defaults to MINIMAX_MODEL)
+            prompt_caching: Send cache_control breakpoints (defaults to
+                MINIMAX_PROMPT_CACHING); only for endpoints that accept them
+        """
+        api_key = api_key or settings.minimax_api_key
+        base_url = base_url or settings.minimax_base_url
         
-        self.async_client = AsyncAnthropic(
-            api_key=settings.minimax_api_key,
-            base_url=settings.minimax_base_url
-        )
+        if not api_key:
+            raise ValueError("MINIMAX_API_KEY is required but not set")
         
-        self.model = settings.minimax_model
+        self.api_key = api_key
+        self.base_url = base_url
+        self._async_client = None
+        self.model = model or settings.minimax_model
+        self.prompt_caching = settings.minimax_prompt_caching if prompt_caching is None else prompt_caching
         self.system_prompt = self._get_system_prompt()
+        
+        self.response_cache = None
+        if settings.llm_cache_enabled:
+            self.response_cache = ResponseCache(
+                ttl_seconds=settings.llm_cache_ttl_seconds,
+                max_entries=settings.llm_cache_max_entries,
+                semantic_enabled=settings.llm_semantic_cache_enabled,
+                semantic_threshold=settings.llm_semantic_cache_threshold
+            )
+    
+    @property
+    def async_client(self):
+        """
+        Anthropic SDK client, created on first use.
+        
+        The SDK import and client construction are deferred so app startup
+        doesn't pay for them. The connection pool is sized to the gateway's
+        in-flight limit so concurrent calls reuse warm keep-alive connections.
+        """
+        if self._async_client is None:
+            import httpx
+            from anthropic import AsyncAnthropic
+            
+            # Retries are handled by the LLM gateway
+            self._async_client = AsyncAnthropic(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.llm_http_max_connections,
+                        max_keepalive_connections=settings.llm_max_in_flight,
+                        keepalive_expiry=30.0
+                    ),
+                    timeout=httpx.Timeout(600.0, connect=5.0)
+                )
+            )
+        return self._async_client
     
     def _get_system_prompt(self) -> str:
         """Get Aletheia system prompt."""
@@ -50,21 +107,90 @@ For data wrangling:
 
 Always show your reasoning process in <think> tags so users can see your thought process."""
     
+    def _system_blocks(self) -> Union[str, List[Dict]]:
+        """System prompt, marked cacheable when prompt caching is enabled."""
+        if not self.prompt_caching:
+            return self.system_prompt
+        
+        return [{
+            "type": "text",
+            "text": self.system_prompt,
+            "cache_control": CACHE_CONTROL
+        }]
+    
+    def _prepare_messages(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Mark the stable history prefix as cacheable.
+        
+        Everything before the newest message is identical to the previous
+        turn's prompt, so a breakpoint on the last history message lets the
+        provider reuse system prompt + history and only process the new turn.
+        The caller's list is not modified.
+        """
+        if not self.prompt_caching or len(messages) < 2:
+            return messages
+        
+        prepared = list(messages)
+        last_history = dict(prepared[-2])
+        content = last_history["content"]
+        
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        else:
+            content = [dict(block) for block in content]
+        
+        if content:
+            content[-1]["cache_control"] = CACHE_CONTROL
+            last_history["content"] = content
+            prepared[-2] = last_history
+        
+        return prepared
+    
+    def _usage_dict(self, usage) -> Dict:
+        """Token usage including prompt cache writes and reads."""
+        return {
+            "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+            "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+            "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0
+        }
+    
     async def generate_response(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 1.0,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        use_cache: bool = True
     ) -> Dict:
-        """Generate non-streaming response."""
-        response = await self.async_client.messages.create(
-            model=self.model,
-            system=self.system_prompt,
-            messages=messages,
-            temperature=temperature,
-            top_p=0.95,
-            max_tokens=max_tokens
-        )
+        """
+        Generate non-streaming response.
+        
+        Args:
+            messages: Conversation messages, newest last
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            use_cache: Serve/store this call through the response cache
+        
+        Returns:
+            Dict with content, thinking_trace, usage (and cache_hit when
+            served from cache)
+        """
+        cache = self.response_cache if use_cache else None
+        
+        if cache is not None:
+            cached = cache.get(self.model, self.system_prompt, messages, temperature)
+            if cached is not None:
+                return cached
+        
+        with span("minimax.generate", model=self.model) as record:
+            response = await self.async_client.messages.create(
+                model=self.model,
+                system=self._system_blocks(),
+                messages=self._prepare_messages(messages),
+                temperature=temperature,
+                top_p=0.95,
+                max_tokens=max_tokens
+            )
         
         # Extract content and thinking trace
         content = ""
@@ -95,14 +221,17 @@ Always show your reasoning process in <think> tags so users can see your thought
             for idx, item in enumerate(thinking_trace)
         ]
 
-        return {
+        result = {
             "content": content,
             "thinking_trace": thinking_trace,
-            "usage": {
-                "input_tokens": response.usage.input_tokens,
-                "output_tokens": response.usage.output_tokens
-            }
+            "usage": self._usage_dict(response.usage)
         }
+        record_llm_usage(self.model, result["usage"], record.duration)
+        
+        if cache is not None and content and response.stop_reason != "max_tokens":
+            cache.put(self.model, self.system_prompt, messages, temperature, result)
+        
+        return result
     
     async def generate_streaming_response(
         self,
@@ -111,28 +240,50 @@ Always show your reasoning process in <think> tags so users can see your thought
         max_tokens: int = 4096
     ) -> AsyncIterator[Dict]:
         """Generate streaming response."""
-        async with self.async_client.messages.stream(
-            model=self.model,
-            system=self.system_prompt,
-            messages=messages,
-            temperature=temperature,
-            top_p=0.95,
-            max_tokens=max_tokens
-        ) as stream:
-            async for event in stream:
-                if event.type == "content_block_start":
-                    if hasattr(event.content_block, 'type'):
-                        yield {"type": "block_start", "block_type": event.content_block.type}
-                
-                elif event.type == "content_block_delta":
-                    if hasattr(event.delta, 'type'):
-                        if event.delta.type == "text_delta":
-                            yield {"type": "text_delta", "text": event.delta.text}
-                        elif event.delta.type == "thinking_delta":
-                            yield {"type": "thinking_delta", "thinking": event.delta.thinking}
-                
-                elif event.type == "message_stop":
-                    yield {"type": "done"}
+        usage = {}
+        started = time.perf_counter()
+        first_token_at = None
+        
+        with span("minimax.stream", model=self.model) as record:
+            async with self.async_client.messages.stream(
+                model=self.model,
+                system=self._system_blocks(),
+                messages=self._prepare_messages(messages),
+                temperature=temperature,
+                top_p=0.95,
+                max_tokens=max_tokens
+            ) as stream:
+                async for event in stream:
+                    if event.type == "message_start":
+                        usage = self._usage_dict(event.message.usage)
+                    
+                    elif event.type == "message_delta":
+                        if getattr(event, "usage", None) is not None:
+                            usage["output_tokens"] = event.usage.output_tokens
+                    
+                    elif event.type == "content_block_start":
+                        if hasattr(event.content_block, 'type'):
+                            yield {"type": "block_start", "block_type": event.content_block.type}
+                    
+                    elif event.type == "content_block_delta":
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                            observe("minimax.stream.first_token", first_token_at - started)
+                        
+                        if hasattr(event.delta, 'type'):
+                            if event.delta.type == "text_delta":
+                                yield {"type": "text_delta", "text": event.delta.text}
+                            elif event.delta.type == "thinking_delta":
+                                yield {"type": "thinking_delta", "thinking": event.delta.thinking}
+                    
+                    elif event.type == "message_stop":
+                        record.attributes["output_tokens"] = usage.get("output_tokens", 0)
+                        record_llm_usage(
+                            self.model,
+                            usage,
+                            time.perf_counter() - (first_token_at or started)
+                        )
+                        yield {"type": "done", "usage": usage}
 
 
 # Global client instance
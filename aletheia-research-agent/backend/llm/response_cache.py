@@ -0,0 +1,249 @@
+"""Exact-match and semantic response cache for LLM calls."""
+import copy
+import json
+import math
+import re
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+Embedding = Dict[int, float]
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share a key."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def normalize_messages(messages: List[Dict]) -> List[Dict]:
+    """Reduce messages to role + normalized text content."""
+    normalized = []
+
+    for message in messages:
+        content = message.get("content", "")
+        if not isinstance(content, str):
+            content = " ".join(
+                block.get("text", "") for block in content
+                if isinstance(block, dict)
+            )
+        normalized.append({
+            "role": message.get("role", "user"),
+            "content": normalize_text(content)
+        })
+
+    return normalized
+
+
+def hashing_embedding(text: str, dimensions: int = 4096) -> Embedding:
+    """
+    Local, dependency-free text embedding.
+
+    Hashes word unigrams/bigrams and character trigrams into a sparse
+    L2-normalized vector. At the default threshold this matches case,
+    punctuation and small spelling variants of the same question; pass a
+    neural embedder through ResponseCache(embedder=...) to match paraphrases.
+    """
+    words = _TOKEN.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    joined = " ".join(words)
+    features += [joined[i:i + 3] for i in range(len(joined) - 2)]
+
+    vector: Embedding = {}
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dimensions
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[index] = vector.get(index, 0.0) + sign
+
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if norm == 0:
+        return {}
+
+    return {index: value / norm for index, value in vector.items()}
+
+
+def cosine(a: Embedding, b: Embedding) -> float:
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+
+class ResponseCache:
+    """
+    Two-tier LLM response cache.
+
+    The exact tier is keyed by a hash of (model, system prompt, normalized
+    messages, temperature). The optional semantic tier reuses an answer for
+    a near-identical standalone question: single-turn requests are embedded
+    and compared against previously answered ones, and a hit above
+    `semantic_threshold` returns that answer. Conversational turns (any
+    request with history) only ever use the exact tier, since the same
+    words mean different things in different conversations.
+
+    Entries expire after `ttl_seconds`; the least recently used entries are
+    dropped beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600,
+        max_entries: int = 1000,
+        semantic_enabled: bool = False,
+        semantic_threshold: float = 0.92,
+        semantic_max_chars: int = 512,
+        embedder: Optional[Callable[[str], Embedding]] = None
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.semantic_enabled = semantic_enabled
+        self.semantic_threshold = semantic_threshold
+        self.semantic_max_chars = semantic_max_chars
+        self.embedder = embedder or hashing_embedding
+
+        # key -> (expires_at, response)
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        # key -> (scope, embedding) for entries eligible for semantic reuse
+        self._vectors: Dict[str, Tuple[str, Embedding]] = {}
+
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+
+    def make_key(
+        self,
+        model: str,
+        system_prompt: str,
+        messages: List[Dict],
+        temperature: float
+    ) -> str:
+        """Exact-match cache key."""
+        raw = json.dumps(
+            [model, normalize_text(system_prompt), normalize_messages(messages), temperature],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _standalone_query(self, messages: List[Dict]) -> Optional[str]:
+        """The question text if this is a single-turn request, else None."""
+        if len(messages) != 1 or messages[0].get("role") != "user":
+            return None
+
+        query = normalize_messages(messages)[0]["content"]
+        if not query or len(query) > self.semantic_max_chars:
+            return None
+
+        return query
+
+    def _scope(self, model: str, system_prompt: str, temperature: float) -> str:
+        """Semantic matches are only valid under the same model/prompt/temperature."""
+        raw = f"{model}\n{normalize_text(system_prompt)}\n{temperature}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(
+        self,
+        model: str,
+        system_prompt: str,
+        messages: List[Dict],
+        temperature: float
+    ) -> Optional[Dict]:
+        """
+        Look up a cached response.
+
+        Returns:
+            Copy of the cached response with "cache_hit" set to "exact" or
+            "semantic", or None on a miss
+        """
+        self._expire()
+
+        key = self.make_key(model, system_prompt, messages, temperature)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits["exact"] += 1
+            return self._hit(key, "exact")
+
+        if self.semantic_enabled:
+            query = self._standalone_query(messages)
+            if query is not None:
+                match = self._nearest(
+                    self._scope(model, system_prompt, temperature),
+                    self.embedder(query)
+                )
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.hits["semantic"] += 1
+                    return self._hit(match, "semantic")
+
+        self.misses += 1
+        return None
+
+    def put(
+        self,
+        model: str,
+        system_prompt: str,
+        messages: List[Dict],
+        temperature: float,
+        response: Dict
+    ):
+        """Store a response for later exact or semantic reuse."""
+        key = self.make_key(model, system_prompt, messages, temperature)
+        self._entries[key] = (time.time() + self.ttl_seconds, copy.deepcopy(response))
+        self._entries.move_to_end(key)
+
+        if self.semantic_enabled:
+            query = self._standalone_query(messages)
+            if query is not None:
+                self._vectors[key] = (
+                    self._scope(model, system_prompt, temperature),
+                    self.embedder(query)
+                )
+
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._vectors.pop(evicted, None)
+
+    def _hit(self, key: str, kind: str) -> Dict:
+        response = copy.deepcopy(self._entries[key][1])
+        response["cache_hit"] = kind
+        return response
+
+    def _nearest(self, scope: str, vector: Embedding) -> Optional[str]:
+        """Most similar cached standalone query in scope, if above threshold."""
+        best_key, best_score = None, self.semantic_threshold
+
+        for key, (entry_scope, entry_vector) in self._vectors.items():
+            if entry_scope != scope:
+                continue
+            score = cosine(vector, entry_vector)
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        return best_key
+
+    def _expire(self):
+        """Drop expired entries."""
+        now = time.time()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+            self._vectors.pop(key, None)
+
+    def clear(self):
+        """Drop every cached response."""
+        self._entries.clear()
+        self._vectors.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        return {
+            "entries": len(self._entries),
+            "semantic_entries": len(self._vectors),
+            "hits": dict(self.hits),
+            "misses": self.misses
+        }
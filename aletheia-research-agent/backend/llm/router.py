@@ -0,0 +1,376 @@
+"""Latency-aware routing and failover across Anthropic-compatible LLM endpoints."""
+import asyncio
+import json
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional
+from config import settings
+from llm.minimax_client import MiniMaxClient
+
+
+# Provider responses worth retrying or failing over: rate limited, overloaded, transient 5xx
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Base URL that selects the in-process stand-in instead of a real endpoint
+STAND_IN_URL = "local://stand-in"
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Throttling, overload, SDK timeouts and connection failures are retryable."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+
+    # Connection/timeout errors from the SDK carry no status code
+    return type(error).__name__ in {"APIConnectionError", "APITimeoutError"}
+
+
+class StandInClient:
+    """
+    In-process stand-in for an Anthropic-compatible endpoint.
+
+    Answers every call with a fixed reply after an optional delay, so the
+    router (and anything above it) can be exercised locally and in tests
+    without network access or API keys.
+    """
+
+    def __init__(self, reply: str = "Stand-in response.", latency: float = 0.0):
+        self.reply = reply
+        self.latency = latency
+        self.model = "stand-in"
+
+    async def generate_response(self, messages: List[Dict], **kwargs) -> Dict:
+        await asyncio.sleep(self.latency)
+        return {
+            "content": self.reply,
+            "thinking_trace": [],
+            "usage": {"input_tokens": 0, "output_tokens": 0}
+        }
+
+    async def generate_streaming_response(self, messages: List[Dict], **kwargs) -> AsyncIterator[Dict]:
+        await asyncio.sleep(self.latency)
+        for word in self.reply.split(" "):
+            yield {"type": "text_delta", "text": word + " "}
+        yield {"type": "done", "usage": {"input_tokens": 0, "output_tokens": 0}}
+
+
+class EndpointStats:
+    """Rolling latency and error-rate window for one endpoint."""
+
+    def __init__(self, window: int = 100):
+        self.latencies = deque(maxlen=window)
+        self.first_chunk_latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    @staticmethod
+    def _percentile(samples: deque, q: float) -> Optional[float]:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def p50(self, streaming: bool = False) -> Optional[float]:
+        return self._percentile(self.first_chunk_latencies if streaming else self.latencies, 0.50)
+
+    def p95(self, streaming: bool = False) -> Optional[float]:
+        return self._percentile(self.first_chunk_latencies if streaming else self.latencies, 0.95)
+
+    def samples(self, streaming: bool = False) -> int:
+        return len(self.first_chunk_latencies if streaming else self.latencies)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def record_success(self, latency: float, streaming: bool = False):
+        (self.first_chunk_latencies if streaming else self.latencies).append(latency)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+
+    def record_failure(self, failure_threshold: int, cooldown: float):
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= failure_threshold:
+            self.cooldown_until = time.monotonic() + cooldown
+
+    def to_dict(self) -> Dict:
+        return {
+            "p50": self.p50(),
+            "p95": self.p95(),
+            "first_chunk_p50": self.p50(streaming=True),
+            "first_chunk_p95": self.p95(streaming=True),
+            "error_rate": round(self.error_rate, 3),
+            "samples": len(self.outcomes)
+        }
+
+
+class Endpoint:
+    """A named LLM client plus its health statistics."""
+
+    def __init__(self, name: str, client, window: int = 100):
+        self.name = name
+        self.client = client
+        self.stats = EndpointStats(window)
+
+
+class LLMRouter:
+    """
+    Routes LLM calls to the fastest healthy endpoint.
+
+    Endpoints are ranked by rolling p50 latency (unmeasured endpoints keep
+    their configured order). An endpoint is unhealthy while cooling down
+    after `failure_threshold` consecutive failures, or when its error rate
+    over the window reaches `max_error_rate`. Retryable failures fail over
+    to the next endpoint; the last error is raised if all of them fail.
+
+    With hedging, if the chosen endpoint hasn't answered (or, for streams,
+    produced its first chunk) within its own p95, the same request is sent
+    to the runner-up and the first result wins; the loser is cancelled.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        hedging: bool = True,
+        hedge_min_samples: int = 20,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        max_error_rate: float = 0.5
+    ):
+        if not endpoints:
+            raise ValueError("LLMRouter needs at least one endpoint")
+
+        self.endpoints = endpoints
+        self.hedging = hedging
+        self.hedge_min_samples = hedge_min_samples
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_error_rate = max_error_rate
+
+    def _healthy(self, endpoint: Endpoint) -> bool:
+        stats = endpoint.stats
+        if time.monotonic() < stats.cooldown_until:
+            return False
+        return len(stats.outcomes) < 10 or stats.error_rate < self.max_error_rate
+
+    def ranked(self, streaming: bool = False) -> List[Endpoint]:
+        """Endpoints in routing order: healthy and fastest first."""
+        def key(item):
+            index, endpoint = item
+            p50 = endpoint.stats.p50(streaming)
+            return (
+                not self._healthy(endpoint),
+                p50 is None,
+                p50 or 0.0,
+                index
+            )
+
+        return [endpoint for _, endpoint in sorted(enumerate(self.endpoints), key=key)]
+
+    def _hedge_delay(self, endpoint: Endpoint, streaming: bool) -> Optional[float]:
+        if not self.hedging or endpoint.stats.samples(streaming) < self.hedge_min_samples:
+            return None
+        return endpoint.stats.p95(streaming)
+
+    def _record_failure(self, endpoint: Endpoint, error: BaseException):
+        print(f"LLM endpoint {endpoint.name} failed: {error}")
+        endpoint.stats.record_failure(self.failure_threshold, self.cooldown)
+
+    async def _call(self, endpoint: Endpoint, messages: List[Dict], kwargs: Dict) -> Dict:
+        started = time.monotonic()
+        try:
+            result = await endpoint.client.generate_response(messages, **kwargs)
+        except Exception as e:
+            if is_retryable_error(e):
+                self._record_failure(endpoint, e)
+            raise
+
+        if not result.get("cache_hit"):
+            endpoint.stats.record_success(time.monotonic() - started)
+        result["endpoint"] = endpoint.name
+        return result
+
+    async def generate_response(
+        self,
+        messages: List[Dict],
+        hedge: bool = True,
+        **kwargs
+    ) -> Dict:
+        """
+        Generate a non-streaming response on the best endpoint.
+
+        Args:
+            messages: Conversation messages, newest last
+            hedge: Allow a hedged duplicate request (interactive calls)
+            **kwargs: Passed through to the client
+
+        Returns:
+            Client response dict, with "endpoint" naming who answered
+        """
+        candidates = self.ranked()
+        last_error: Optional[Exception] = None
+
+        while candidates:
+            primary = candidates.pop(0)
+            delay = self._hedge_delay(primary, streaming=False) if hedge and candidates else None
+
+            tasks = {asyncio.create_task(self._call(primary, messages, kwargs)): primary}
+            try:
+                if delay is not None:
+                    done, _ = await asyncio.wait(tasks, timeout=delay)
+                    if not done:
+                        backup = candidates.pop(0)
+                        tasks[asyncio.create_task(self._call(backup, messages, kwargs))] = backup
+
+                while tasks:
+                    done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        tasks.pop(task)
+                        error = task.exception()
+                        if error is None:
+                            return task.result()
+                        if not is_retryable_error(error):
+                            raise error
+                        last_error = error
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        raise last_error
+
+    async def _open_stream(self, endpoint: Endpoint, messages: List[Dict], kwargs: Dict):
+        """Start a stream and wait for its first chunk."""
+        started = time.monotonic()
+        stream = endpoint.client.generate_streaming_response(messages, **kwargs)
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except BaseException as e:
+            await stream.aclose()
+            if isinstance(e, Exception) and is_retryable_error(e):
+                self._record_failure(endpoint, e)
+            raise
+
+        endpoint.stats.record_success(time.monotonic() - started, streaming=True)
+        return stream, first
+
+    async def generate_streaming_response(
+        self,
+        messages: List[Dict],
+        hedge: bool = True,
+        **kwargs
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream a response from the best endpoint.
+
+        Routing, failover and hedging are decided on time-to-first-chunk;
+        once a stream has produced its first chunk it is committed to.
+        """
+        candidates = self.ranked(streaming=True)
+        last_error: Optional[Exception] = None
+        winner = None
+
+        while candidates and winner is None:
+            primary = candidates.pop(0)
+            delay = self._hedge_delay(primary, streaming=True) if hedge and candidates else None
+
+            tasks = {asyncio.create_task(self._open_stream(primary, messages, kwargs)): primary}
+            try:
+                if delay is not None:
+                    done, _ = await asyncio.wait(tasks, timeout=delay)
+                    if not done:
+                        backup = candidates.pop(0)
+                        tasks[asyncio.create_task(self._open_stream(backup, messages, kwargs))] = backup
+
+                while tasks and winner is None:
+                    done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        tasks.pop(task)
+                        error = task.exception()
+                        if error is None and winner is None:
+                            winner = task.result()
+                        elif error is None:
+                            # Both hedges produced a first chunk in the same tick
+                            await task.result()[0].aclose()
+                        elif not is_retryable_error(error):
+                            raise error
+                        else:
+                            last_error = error
+            finally:
+                for task in tasks:
+                    task.cancel()
+                for outcome in await asyncio.gather(*tasks, return_exceptions=True):
+                    if isinstance(outcome, tuple):
+                        await outcome[0].aclose()
+
+        if winner is None:
+            raise last_error
+
+        stream, first = winner
+        try:
+            if first is not None:
+                yield first
+                async for chunk in stream:
+                    yield chunk
+        finally:
+            await stream.aclose()
+
+    def stats(self) -> Dict:
+        """Per-endpoint latency and health."""
+        return {
+            endpoint.name: {**endpoint.stats.to_dict(), "healthy": self._healthy(endpoint)}
+            for endpoint in self.endpoints
+        }
+
+
+def _build_endpoints() -> List[Endpoint]:
+    """
+    Endpoints from LLM_ENDPOINTS, falling back to the single MINIMAX_* endpoint.
+
+    LLM_ENDPOINTS is a JSON list of {"name", "base_url", "api_key", "model",
+    "prompt_caching"}; missing fields default to the MINIMAX_* settings and
+    a base_url of "local://stand-in" selects the in-process stand-in.
+    """
+    configs = json.loads(settings.llm_endpoints) if settings.llm_endpoints else [{"name": "minimax"}]
+
+    endpoints = []
+    for index, config in enumerate(configs):
+        name = config.get("name") or f"endpoint-{index}"
+
+        if config.get("base_url") == STAND_IN_URL:
+            endpoints.append(Endpoint(name, StandInClient()))
+            continue
+
+        try:
+            client = MiniMaxClient(
+                api_key=config.get("api_key"),
+                base_url=config.get("base_url"),
+                model=config.get("model"),
+                prompt_caching=config.get("prompt_caching")
+            )
+        except ValueError as e:
+            print(f"Skipping LLM endpoint {name}: {e}")
+            continue
+
+        endpoints.append(Endpoint(name, client))
+
+    return endpoints
+
+
+# Global router instance
+llm_router = None
+
+def get_llm_router() -> LLMRouter:
+    """Get or create the LLM router."""
+    global llm_router
+    if llm_router is None:
+        endpoints = _build_endpoints()
+        if not endpoints:
+            raise ValueError("MINIMAX_API_KEY is required but not set")
+        llm_router = LLMRouter(endpoints, hedging=settings.llm_hedging_enabled)
+    return llm_router
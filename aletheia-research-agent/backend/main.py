@@ -1,16 +1,22 @@
 """Main FastAPI application."""
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPAuthorizationCredentials
 from fastapi import Security
 from middleware.rate_limiter import rate_limit_middleware
 from middleware.error_handler import error_handler_middleware
+from metrics import metrics_middleware, monitor_event_loop_lag
 from api.auth_routes import router as auth_router
 from api.chat_routes import router as chat_router
 from config import settings
+from database import get_message_writer, get_search_query_writer
+from agents.research_agent import get_research_runtime
+from tools.web_search import search_tool
 from fastapi.security import HTTPBearer
 from jose import jwt
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 security = HTTPBearer()
 
@@ -46,11 +52,37 @@ if settings.environment == "production":
 app.middleware("http")(rate_limit_middleware)
 app.middleware("http")(error_handler_middleware)
 
+# Outermost, so rate-limited and failed requests are measured too
+if settings.metrics_enabled:
+    app.middleware("http")(metrics_middleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(chat_router)
 
 
+@app.on_event("startup")
+async def startup():
+    """Compile the research graph and build LLM clients before serving."""
+    if settings.metrics_enabled:
+        app.state.loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    
+    if settings.research_warm_up:
+        await get_research_runtime().warm_up()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush queued message writes and close pooled connections."""
+    loop_lag_monitor = getattr(app.state, "loop_lag_monitor", None)
+    if loop_lag_monitor is not None:
+        loop_lag_monitor.cancel()
+    
+    await get_message_writer().close()
+    await get_search_query_writer().close()
+    await search_tool.close()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -67,6 +99,14 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this worker process."""
+    if not settings.metrics_enabled:
+        return Response(status_code=404)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/debug-token")
 async def debug_token(credentials: HTTPAuthorizationCredentials = Security(security)):
     """Debug endpoint to inspect token payload."""
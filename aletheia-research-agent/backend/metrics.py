@@ -0,0 +1,202 @@
+"""Prometheus metrics for the /metrics endpoint."""
+import asyncio
+import sys
+import time
+from typing import Dict, Iterator, Tuple
+from fastapi import Request
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+
+REQUEST_DURATION = Histogram(
+    "aletheia_http_request_duration_seconds",
+    "Time until response headers are sent, per route",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "aletheia_rate_limit_rejections_total",
+    "Requests rejected by the rate limiter"
+)
+
+LLM_TOKENS = Counter(
+    "aletheia_llm_tokens_total",
+    "LLM tokens processed; rate() gives tokens/sec",
+    ["model", "kind"]
+)
+
+LLM_OUTPUT_TOKENS_PER_SECOND = Histogram(
+    "aletheia_llm_output_tokens_per_second",
+    "Generation speed of each LLM call (output tokens over generation time)",
+    ["model"],
+    buckets=(5, 10, 20, 40, 60, 80, 100, 150, 200, 300)
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "aletheia_event_loop_lag_seconds",
+    "How late the event loop wakes a sleeping task",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+def record_llm_usage(model: str, usage: Dict, generation_seconds: float):
+    """
+    Count tokens from one LLM call and record its generation speed.
+
+    Args:
+        model: Model name
+        usage: Usage dict from the LLM client
+        generation_seconds: Time spent producing the output tokens
+    """
+    for kind in ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"):
+        tokens = usage.get(kind, 0)
+        if tokens:
+            LLM_TOKENS.labels(model, kind.replace("_tokens", "")).inc(tokens)
+
+    output_tokens = usage.get("output_tokens", 0)
+    if output_tokens and generation_seconds > 0:
+        LLM_OUTPUT_TOKENS_PER_SECOND.labels(model).observe(output_tokens / generation_seconds)
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Observe request latency labelled by route template (not raw path)."""
+    started = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_DURATION.labels(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            str(status)
+        ).observe(time.perf_counter() - started)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """
+    Measure event loop lag until cancelled.
+
+    Sleeps for `interval` and records how much later than requested it
+    woke up. Sustained lag means something is blocking the loop or the
+    worker is saturated.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - started - interval))
+
+
+def _loaded(module: str, name: str):
+    """A global singleton if its module is imported and it has been created."""
+    return getattr(sys.modules.get(module), name, None)
+
+
+class AppStateCollector:
+    """
+    Reads queue, pool and cache state at scrape time.
+
+    Only components that already exist are reported; scraping never
+    creates clients or imports SDKs.
+    """
+
+    def collect(self) -> Iterator:
+        # (cache, owner) -> ResponseCache.stats(), reported as one family
+        caches: Dict[Tuple[str, str], Dict] = {}
+
+        yield from self._llm_gateway(caches)
+        yield from self._research_runtime(caches)
+        yield from self._sse_streams()
+        yield from self._web_search()
+        yield from self._cache_metrics(caches)
+
+    def _llm_gateway(self, caches: Dict) -> Iterator:
+        gateway = _loaded("llm.gateway", "llm_gateway")
+        if gateway is None:
+            return
+
+        stats = gateway.stats()
+        yield GaugeMetricFamily("aletheia_llm_in_flight", "LLM calls holding a gateway slot", value=stats["in_flight"])
+        yield GaugeMetricFamily("aletheia_llm_queued", "LLM calls waiting for a gateway slot", value=stats["queued"])
+        yield GaugeMetricFamily(
+            "aletheia_llm_pool_utilization",
+            "Share of LLM gateway slots (pooled connections) in use",
+            value=stats["in_flight"] / stats["max_in_flight"] if stats["max_in_flight"] else 0.0
+        )
+
+        router = _loaded("llm.router", "llm_router")
+        if router is None:
+            return
+
+        healthy = GaugeMetricFamily("aletheia_llm_endpoint_healthy", "1 if the endpoint is taking traffic", labels=["endpoint"])
+        for name, endpoint_stats in router.stats().items():
+            healthy.add_metric([name], 1.0 if endpoint_stats["healthy"] else 0.0)
+        yield healthy
+
+        for endpoint in router.endpoints:
+            response_cache = getattr(endpoint.client, "response_cache", None)
+            if response_cache is not None:
+                caches[("llm", endpoint.name)] = response_cache.stats()
+
+    def _research_runtime(self, caches: Dict) -> Iterator:
+        runtime = _loaded("agents.research_agent", "research_runtime")
+        if runtime is None:
+            return
+
+        stats = runtime.stats()
+        yield GaugeMetricFamily("aletheia_research_runs_running", "Research agent runs executing", value=stats["running"])
+        yield GaugeMetricFamily("aletheia_research_runs_waiting", "Research agent runs queued for a slot", value=stats["waiting"])
+        yield GaugeMetricFamily(
+            "aletheia_research_runs_max_concurrent", "Research agent run slots", value=stats["max_concurrent_runs"]
+        )
+        yield CounterMetricFamily("aletheia_research_runs_rejected", "Research runs that timed out in the queue", value=stats["rejected"])
+
+        if stats["result_cache"] is not None:
+            caches[("research", "agent")] = stats["result_cache"]
+
+    def _sse_streams(self) -> Iterator:
+        streams = _loaded("api.stream_replay", "resumable_streams")
+        if streams is None:
+            return
+
+        stats = streams.stats()
+        yield GaugeMetricFamily("aletheia_sse_generations_in_flight", "Chat generations still producing", value=stats["generations"])
+        yield GaugeMetricFamily("aletheia_sse_connections", "Clients attached to SSE streams", value=stats["connections"])
+
+    def _web_search(self) -> Iterator:
+        search_tool = _loaded("tools.web_search", "search_tool")
+        if search_tool is None:
+            return
+
+        stats = search_tool.stats()
+        yield GaugeMetricFamily("aletheia_web_search_in_flight", "Web search and verification requests in progress", value=stats["in_flight"])
+        yield GaugeMetricFamily(
+            "aletheia_web_search_pool_utilization",
+            "Share of the web search connection pool in use",
+            value=stats["in_flight"] / stats["max_connections"]
+        )
+
+    @staticmethod
+    def _cache_metrics(caches: Dict[Tuple[str, str], Dict]) -> Iterator:
+        """Hit/miss counters and sizes; hit rate is hits / (hits + misses)."""
+        hits = CounterMetricFamily("aletheia_cache_hits", "Cache hits by tier", labels=["cache", "owner", "tier"])
+        misses = CounterMetricFamily("aletheia_cache_misses", "Cache misses", labels=["cache", "owner"])
+        entries = GaugeMetricFamily("aletheia_cache_entries", "Cached entries", labels=["cache", "owner"])
+
+        for (cache, owner), stats in caches.items():
+            for tier, count in stats["hits"].items():
+                hits.add_metric([cache, owner, tier], count)
+            misses.add_metric([cache, owner], stats["misses"])
+            entries.add_metric([cache, owner], stats["entries"])
+
+        yield hits
+        yield misses
+        yield entries
+
+
+REGISTRY.register(AppStateCollector())
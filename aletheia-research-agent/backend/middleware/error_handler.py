@@ -1,6 +1,5 @@
 """Error handling middleware."""
 import traceback
-import bleach
 from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
 from typing import Union
@@ -42,6 +41,9 @@ def sanitize_input(text: str) -> str:
     Returns:
         Sanitized text
     """
+    # Imported on first use to keep it off the startup path
+    import bleach
+    
     # Allow basic formatting tags
     allowed_tags = ['b', 'i', 'u', 'em', 'strong', 'a', 'p', 'br']
     allowed_attributes = {'a': ['href', 'title']}
@@ -3,6 +3,7 @@ import time
 from collections import defaultdict
 from fastapi import Request, HTTPException
 from config import settings
+from metrics import RATE_LIMIT_REJECTIONS
 
 
 class RateLimiter:
@@ -55,6 +56,7 @@ async def rate_limit_middleware(request: Request, call_next):
     try:
         rate_limiter.check_rate_limit(client_ip)
     except HTTPException as e:
+        RATE_LIMIT_REJECTIONS.inc()
         from fastapi.responses import JSONResponse
         return JSONResponse(
             status_code=e.status_code,
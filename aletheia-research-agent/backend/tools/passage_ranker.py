@@ -0,0 +1,156 @@
+"""Passage selection for synthesis: BM25 rerank, near-duplicate removal, token budget."""
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_TOKEN = re.compile(r"\w+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that "
+    "the this to was were what when where which who why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords."""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class BM25:
+    """Okapi BM25 over a small in-memory corpus."""
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(document) for document in documents]
+        self.lengths = [len(document) for document in documents]
+        self.avg_length = sum(self.lengths) / len(documents) if documents else 0.0
+
+        document_frequency = Counter(term for document in documents for term in set(document))
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def score(self, query_terms: List[str], index: int) -> float:
+        counts = self.term_counts[index]
+        length_norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / (self.avg_length or 1))
+
+        score = 0.0
+        for term in query_terms:
+            frequency = counts.get(term)
+            if frequency:
+                score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + length_norm)
+        return score
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def select_passages(
+    query: str,
+    documents: List[str],
+    token_budget: int = 3000,
+    duplicate_threshold: float = 0.8,
+    embedder: Optional[Callable[[str], Dict[int, float]]] = None,
+    embedding_weight: float = 0.5
+) -> List[Tuple[int, str]]:
+    """
+    Pick the most relevant sentences across documents within a token budget.
+
+    Every sentence of every document is scored with BM25 against the query
+    (plus cosine similarity from `embedder` when given), near-duplicate
+    sentences repeated across documents are dropped, and the best remaining
+    sentences are taken until the budget is spent or relevance runs out.
+    If nothing matches the query at all, sentences are taken in document
+    order instead. Selected sentences are put back in their original order
+    per document.
+
+    Args:
+        query: Research question (sub-queries may be appended)
+        documents: Source texts, best-ranked first
+        token_budget: Approximate tokens of source text to keep
+        duplicate_threshold: Word-set Jaccard similarity treated as duplicate
+        embedder: Optional text -> normalized sparse vector function
+        embedding_weight: Weight of embedding similarity vs normalized BM25
+
+    Returns:
+        (document index, excerpt) for every document that contributed at
+        least one sentence, in document order
+    """
+    sentences = []  # (document index, position, text)
+    for document_index, document in enumerate(documents):
+        for position, sentence in enumerate(_SENTENCE_SPLIT.split(document)):
+            sentence = sentence.strip()
+            if len(sentence) >= 20:
+                sentences.append((document_index, position, sentence))
+
+    if not sentences:
+        return []
+
+    tokenized = [tokenize(text) for _, _, text in sentences]
+    bm25 = BM25(tokenized)
+    query_terms = list(dict.fromkeys(tokenize(query)))
+
+    scores = [bm25.score(query_terms, index) for index in range(len(sentences))]
+    top = max(scores) or 1.0
+    scores = [score / top for score in scores]
+
+    if embedder is not None:
+        query_vector = embedder(query)
+        for index, (_, _, text) in enumerate(sentences):
+            vector = embedder(text)
+            similarity = sum(value * vector.get(dim, 0.0) for dim, value in query_vector.items())
+            scores[index] += embedding_weight * similarity
+
+    # Ties keep document order, so higher-ranked sources win
+    order = sorted(range(len(sentences)), key=lambda index: (-scores[index], index))
+
+    any_relevant = max(scores) > 0
+    selected: Dict[int, List] = {}
+    kept_word_sets: List[frozenset] = []
+    used = 0
+
+    for index in order:
+        # Sentences sharing nothing with the query aren't worth the tokens
+        if any_relevant and scores[index] <= 0:
+            break
+
+        document_index, position, text = sentences[index]
+        cost = estimate_tokens(text)
+        if used + cost > token_budget:
+            continue
+
+        words = frozenset(tokenized[index])
+        if any(_jaccard(words, kept) >= duplicate_threshold for kept in kept_word_sets):
+            continue
+
+        kept_word_sets.append(words)
+        selected.setdefault(document_index, []).append((position, text))
+        used += cost
+
+    passages = []
+    for document_index in sorted(selected):
+        excerpt_parts = []
+        previous = None
+        for position, text in sorted(selected[document_index]):
+            if previous is not None and position != previous + 1:
+                excerpt_parts.append("…")
+            excerpt_parts.append(text)
+            previous = position
+
+        passages.append((document_index, " ".join(excerpt_parts)))
+
+    return passages
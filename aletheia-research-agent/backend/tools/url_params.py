@@ -0,0 +1,31 @@
+"""Query parameters that identify the visitor rather than the page."""
+
+
+# Dropped when matched exactly (case-insensitive)
+TRACKING_PARAMS = {"ref", "fbclid", "gclid"}
+
+# Dropped when the key starts with one of these
+TRACKING_PREFIXES = ("utm_",)
+
+# Hosts where ?ref= selects content (a GitHub branch or tag) and is kept
+REF_SIGNIFICANT_HOSTS = {"github.com"}
+
+
+def is_tracking_param(key: str, host: str) -> bool:
+    """
+    Whether a query parameter can be dropped without changing the page.
+
+    Args:
+        key: Query parameter name
+        host: Lowercase hostname of the URL, without port
+
+    Returns:
+        True for utm_* and the exact tracking keys, except ref on hosts
+        where it selects content
+    """
+    key = key.lower()
+    if key.startswith(TRACKING_PREFIXES):
+        return True
+    if key == "ref" and any(host == h or host.endswith("." + h) for h in REF_SIGNIFICANT_HOSTS):
+        return False
+    return key in TRACKING_PARAMS
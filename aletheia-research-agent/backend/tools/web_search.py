@@ -2,7 +2,25 @@
 import aiohttp
 import asyncio
 from typing import List, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 from config import settings
+from tools.url_params import is_tracking_param
+from tracing import span
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL so the same page found by different queries dedupes."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query)
+        if not is_tracking_param(key, host)
+    ))
+    
+    return urlunsplit(("https", host, parts.path.rstrip("/"), query, ""))
 
 
 class WebSearchTool:
@@ -12,6 +30,31 @@ class WebSearchTool:
         """Initialize search tool."""
         self.tavily_api_key = settings.tavily_api_key
         self.tavily_url = "https://api.tavily.com/search"
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.max_connections = 32
+        self.in_flight = 0
+    
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session so concurrent searches reuse pooled connections."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    limit_per_host=16,
+                    ttl_dns_cache=300
+                )
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the pooled session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+    
+    def stats(self) -> Dict:
+        """Requests currently using the pooled session."""
+        return {"in_flight": self.in_flight, "max_connections": self.max_connections}
     
     async def search(
         self,
@@ -33,41 +76,61 @@ class WebSearchTool:
         if not self.tavily_api_key:
             return self._mock_search_results(query, max_results)
         
+        with span("tavily.search", query=query) as record:
+            self.in_flight += 1
+            try:
+                results = await self._tavily_search(query, max_results, search_depth)
+            finally:
+                self.in_flight -= 1
+            
+            if results is None:
+                record.status = "error"
+                return self._mock_search_results(query, max_results)
+            
+            record.attributes["results_count"] = len(results)
+            return results
+    
+    async def _tavily_search(
+        self,
+        query: str,
+        max_results: int,
+        search_depth: str
+    ) -> Optional[List[Dict]]:
+        """Call Tavily; None when the search failed."""
         try:
-            async with aiohttp.ClientSession() as session:
-                payload = {
-                    "api_key": self.tavily_api_key,
-                    "query": query,
-                    "max_results": max_results,
-                    "search_depth": search_depth,
-                    "include_answer": True,
-                    "include_raw_content": False
-                }
-                
-                async with session.post(
-                    self.tavily_url,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        results = []
-                        
-                        for item in data.get("results", []):
-                            results.append({
-                                "title": item.get("title", ""),
-                                "url": item.get("url", ""),
-                                "content": item.get("content", ""),
-                                "score": item.get("score", 0.0)
-                            })
-                        
-                        return results
-                    else:
-                        return self._mock_search_results(query, max_results)
+            payload = {
+                "api_key": self.tavily_api_key,
+                "query": query,
+                "max_results": max_results,
+                "search_depth": search_depth,
+                "include_answer": True,
+                "include_raw_content": False
+            }
+            
+            async with self.session.post(
+                self.tavily_url,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    results = []
+                    
+                    for item in data.get("results", []):
+                        results.append({
+                            "title": item.get("title", ""),
+                            "url": item.get("url", ""),
+                            "content": item.get("content", ""),
+                            "score": item.get("score", 0.0)
+                        })
+                    
+                    return results
+                else:
+                    return None
         
         except Exception as e:
             print(f"Search error: {e}")
-            return self._mock_search_results(query, max_results)
+            return None
     
     def _mock_search_results(self, query: str, max_results: int) -> List[Dict]:
         """
@@ -78,33 +141,45 @@ class WebSearchTool:
             "title": f"Search unavailable: {query}",
             "url": "https://example.com",
             "content": "Web search is currently unavailable. Please configure TAVILY_API_KEY.",
-            "score": 0.0
+            "score": 0.0,
+            "placeholder": True
         }]
     
     async def verify_source(self, url: str) -> Dict:
         """Verify and fetch metadata from a source URL."""
+        with span("source.verify") as record:
+            self.in_flight += 1
+            try:
+                result = await self._fetch_source(url)
+            finally:
+                self.in_flight -= 1
+            
+            if not result["accessible"]:
+                record.status = "error"
+            return result
+    
+    async def _fetch_source(self, url: str) -> Dict:
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url,
-                    timeout=aiohttp.ClientTimeout(total=5),
-                    headers={"User-Agent": "Aletheia-Research-Agent/1.0"}
-                ) as response:
-                    if response.status == 200:
-                        text = await response.text()
-                        return {
-                            "url": url,
-                            "status": "verified",
-                            "accessible": True,
-                            "content_length": len(text)
-                        }
-                    else:
-                        return {
-                            "url": url,
-                            "status": "failed",
-                            "accessible": False,
-                            "error": f"HTTP {response.status}"
-                        }
+            async with self.session.get(
+                url,
+                timeout=aiohttp.ClientTimeout(total=5),
+                headers={"User-Agent": "Aletheia-Research-Agent/1.0"}
+            ) as response:
+                if response.status == 200:
+                    text = await response.text()
+                    return {
+                        "url": url,
+                        "status": "verified",
+                        "accessible": True,
+                        "content_length": len(text)
+                    }
+                else:
+                    return {
+                        "url": url,
+                        "status": "failed",
+                        "accessible": False,
+                        "error": f"HTTP {response.status}"
+                    }
         except Exception as e:
             return {
                 "url": url,
@@ -123,6 +198,57 @@ async def perform_search(query: str, max_results: int = 5) -> List[Dict]:
     return await search_tool.search(query, max_results)
 
 
+async def perform_multi_search(
+    queries: List[str],
+    max_results_per_query: int = 5,
+    max_results: int = 8
+) -> List[Dict]:
+    """
+    Run several searches concurrently and fuse the results.
+    
+    Results are deduplicated by canonical URL and ranked by reciprocal rank
+    fusion, so a page that several sub-queries rank highly beats one that
+    a single query happened to return first. Wall time is that of the
+    slowest single search.
+    
+    Args:
+        queries: Search queries
+        max_results_per_query: Results requested from each search
+        max_results: Results returned after fusion
+    
+    Returns:
+        Ranked, deduplicated results; each carries the sub-queries that found it
+    """
+    result_lists = await asyncio.gather(
+        *(search_tool.search(query, max_results_per_query) for query in queries),
+        return_exceptions=True
+    )
+    
+    fused: Dict[str, Dict] = {}
+    for query, results in zip(queries, result_lists):
+        if isinstance(results, Exception):
+            print(f"Search error for {query!r}: {results}")
+            continue
+        
+        for rank, result in enumerate(results):
+            key = canonical_url(result["url"])
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {**result, "queries": [], "rank_score": 0.0}
+            elif result.get("score", 0.0) > entry.get("score", 0.0):
+                entry.update({k: v for k, v in result.items() if k in ("title", "content", "score")})
+            
+            entry["queries"].append(query)
+            entry["rank_score"] += 1.0 / (60 + rank)
+    
+    ranked = sorted(
+        fused.values(),
+        key=lambda entry: (entry["rank_score"], entry.get("score", 0.0)),
+        reverse=True
+    )
+    return ranked[:max_results]
+
+
 async def cross_verify_sources(sources: List[str]) -> List[Dict]:
     """Cross-verify multiple sources."""
     tasks = [search_tool.verify_source(url) for url in sources]
@@ -0,0 +1,100 @@
+"""Lightweight tracing: timed spans exported as Prometheus histograms."""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+from prometheus_client import Histogram
+
+try:
+    from opentelemetry import trace as otel_trace
+    _otel_tracer = otel_trace.get_tracer("aletheia")
+except ImportError:
+    _otel_tracer = None
+
+
+SPAN_DURATION = Histogram(
+    "aletheia_span_duration_seconds",
+    "Duration of traced operations (agent nodes, external calls, queries)",
+    ["span", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+
+@dataclass(slots=True)
+class Span:
+    """One timed operation."""
+    name: str
+    attributes: Dict = field(default_factory=dict)
+    duration: float = 0.0
+    status: str = "ok"
+
+    @property
+    def duration_ms(self) -> int:
+        return round(self.duration * 1000)
+
+
+# Spans finished within the current collect_spans() block, if any
+_collected: ContextVar[Optional[List[Span]]] = ContextVar("aletheia_spans", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Time a block of code.
+
+    The duration is observed in the span histogram under `name` with a
+    status of "ok", "error" or "cancelled" (the block can also set
+    `status` itself, e.g. when it falls back after a failed call). Spans
+    are flat: there is no parent tracking, so this is safe to use across
+    yields in async generators. When OpenTelemetry is installed, each span
+    is also exported as an OpenTelemetry span.
+
+    Yields:
+        The Span; attributes may be added while it is open
+    """
+    record = Span(name, attributes)
+    otel_span = _otel_tracer.start_span(name, attributes=attributes) if _otel_tracer else None
+    started = time.perf_counter()
+
+    try:
+        yield record
+    except (asyncio.CancelledError, GeneratorExit):
+        record.status = "cancelled"
+        raise
+    except BaseException:
+        record.status = "error"
+        raise
+    finally:
+        record.duration = time.perf_counter() - started
+        SPAN_DURATION.labels(name, record.status).observe(record.duration)
+
+        if otel_span is not None:
+            otel_span.set_attributes({"status": record.status, **record.attributes})
+            otel_span.end()
+
+        collected = _collected.get()
+        if collected is not None:
+            collected.append(record)
+
+
+def observe(name: str, seconds: float, status: str = "ok"):
+    """Record a duration measured elsewhere (e.g. time to first token)."""
+    SPAN_DURATION.labels(name, status).observe(seconds)
+
+
+@contextmanager
+def collect_spans() -> Iterator[List[Span]]:
+    """
+    Collect every span finished inside the block, including in tasks it starts.
+
+    Yields:
+        List that fills with finished spans
+    """
+    spans: List[Span] = []
+    token = _collected.set(spans)
+    try:
+        yield spans
+    finally:
+        _collected.reset(token)